@@ -0,0 +1 @@
+"""Wing-beat and morphology analysis of the Mosca Project mosquito populations."""
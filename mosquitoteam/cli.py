@@ -0,0 +1,104 @@
+import argparse
+import os
+
+import pandas as pd
+
+from mosquitoteam import data
+from mosquitoteam.data import TRAITS, convert_all
+from mosquitoteam.mixtures import mixture_screen
+from mosquitoteam.outliers import outlier_table
+from mosquitoteam.resampling import (bootstrap_differences, group_bootstrap_differences, group_permutation_anovas,
+                                     permutation_anovas)
+from mosquitoteam.robust import games_howell, kruskal_wallis, welch_anovas
+from mosquitoteam.stats import gender_anovas, one_way_anova, population_moments, summaries, tukey_hsd
+
+
+def analyze(output, alpha=0.05, resamples=0, seed=0):
+    """Write every analysis table of the app as CSV files into ``output``.
+
+    With ``resamples`` > 0 the permutation tests and bootstrap intervals of
+    the gender and population comparisons are written too.
+    """
+    os.makedirs(output, exist_ok=True)
+
+    # float32 measurements carry about 7 significant digits
+    summaries().to_csv(os.path.join(output, "summary.csv"), float_format="%.7g")
+
+    gender_anovas().to_csv(os.path.join(output, "gender_anova.csv"), index=False)
+
+    group_anovas, tukeys = [], []
+    for trait in TRAITS:
+        moments = population_moments(trait)
+        group_anovas.append(one_way_anova(moments, alpha).rename(trait))
+        tukeys.append(tukey_hsd(moments, alpha).assign(trait=trait))
+    pd.DataFrame(group_anovas).rename_axis("trait") \
+        .to_csv(os.path.join(output, "group_anova.csv"))
+    pd.concat(tukeys, ignore_index=True).to_csv(os.path.join(output, "tukey_hsd.csv"), index=False)
+    welch_anovas().to_csv(os.path.join(output, "welch_anova.csv"), index=False)
+    kruskal_wallis().to_csv(os.path.join(output, "kruskal_wallis.csv"), index=False)
+    games_howell(alpha).to_csv(os.path.join(output, "games_howell.csv"), index=False)
+    pd.concat([outlier_table(trait).assign(trait=trait) for trait in TRAITS], ignore_index=True) \
+        .to_csv(os.path.join(output, "outliers.csv"), index=False)
+    mixture_screen(seed=seed).to_csv(os.path.join(output, "mixtures.csv"))
+
+    if resamples:
+        permutation_anovas(resamples, seed).to_csv(os.path.join(output, "permutation_anova.csv"), index=False)
+        bootstrap_differences(resamples, seed, alpha).to_csv(os.path.join(output, "bootstrap_differences.csv"),
+                                                             index=False)
+        group_permutation_anovas(resamples, seed).to_csv(os.path.join(output, "group_permutation_anova.csv"),
+                                                         index=False)
+        group_bootstrap_differences(resamples, seed, alpha).to_csv(
+            os.path.join(output, "group_bootstrap_differences.csv"), index=False)
+
+
+def export_figures(output, format):
+    # plotly and kaleido are only needed for this command
+    from mosquitoteam.export import report_figures, write_zip
+
+    write_zip(report_figures(), output, format)
+
+
+def ingest_batch(name, file):
+    # Only the new rows are read; the statistics are updated, not recomputed
+    from mosquitoteam.ingest import ingest
+
+    state = ingest(name, pd.read_csv(file, encoding="utf-8-sig"))
+    anovas = state.gender_anovas()
+    print(anovas[anovas["population"] == name].to_string(index=False))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="mosquitoteam",
+                                     description="Run the Mosca Project analysis without the web app.")
+    parser.add_argument("--data", help="directory of population CSV files (default: the package directory)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("analyze", help="write summary, ANOVA, Tukey HSD, robust test and subgroup tables as CSV")
+    command.add_argument("output", help="directory for the result tables")
+    command.add_argument("--alpha", type=float, default=0.05, help="significance level (default: 0.05)")
+    command.add_argument("--resamples", type=int, default=0,
+                         help="permutations and bootstrap resamples of the gender and population tests (default: 0, skipped)")
+    command.add_argument("--seed", type=int, default=0, help="seed of the resampling and dip test simulations (default: 0)")
+
+    command = commands.add_parser("figures", help="render every figure into one ZIP archive")
+    command.add_argument("output", help="path of the ZIP archive")
+    command.add_argument("--format", choices=("png", "svg"), default="png")
+
+    commands.add_parser("convert", help="build the memory-mapped columnar store of every population")
+
+    command = commands.add_parser("ingest", help="append a batch of new individuals to a population")
+    command.add_argument("population", help="name of the population dataset")
+    command.add_argument("batch", help="CSV file of new rows with the population's columns")
+
+    args = parser.parse_args(argv)
+    if args.data:
+        data.DATA_DIR = args.data
+
+    if args.command == "analyze":
+        analyze(args.output, args.alpha, args.resamples, args.seed)
+    elif args.command == "figures":
+        export_figures(args.output, args.format)
+    elif args.command == "ingest":
+        ingest_batch(args.population, args.batch)
+    else:
+        convert_all()
@@ -0,0 +1,283 @@
+import hashlib
+import os
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from mosquitoteam.lazy import lazy_import
+
+# The columnar store is optional, CSV is always readable
+feather = lazy_import("pyarrow.feather", optional=True)
+
+# Every ``<population>.csv`` in this directory is a population dataset.
+DATA_DIR = os.environ.get("MOSQUITOTEAM_DATA", os.path.dirname(os.path.abspath(__file__)))
+
+# Measurement columns shared by every population file. The first column is
+# named after the population and holds the gender label. Wingbeat counts fit
+# in 16 bits (nullable, as a count can be missing like any other trait), and
+# weights and wing lengths are recorded with far fewer significant digits
+# than float32 keeps.
+TRAIT_DTYPES = {
+    "WB_Arm1": "Int16",
+    "WB_Arm2": "Int16",
+    "Wet weight": "float32",
+    "Dry_wheigth": "float32",
+    "Time fly (s)": "float64",
+    "Intensity(dB)Edit": "float64",
+    "Wing Lw (mm)": "float32",
+    "Wing Ll (mm)": "float32",
+    "Wing Rw (mm)": "float32",
+    "Wing Rl (mm)": "float32",
+}
+TRAITS = tuple(TRAIT_DTYPES)
+STATE_COLUMN = "State "
+
+GROUP_COLUMNS = ("group", "gender", "WB_Arm1", "WB_Arm2")
+# Label columns of the long-form table that individuals can be selected by
+GROUP_KEYS = ("group", "gender", "state")
+
+
+def _version(path):
+    # A file's content version is its (mtime, size); editing or replacing
+    # the file changes the key and forces a fresh parse.
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def store_path(path):
+    return os.path.splitext(path)[0] + ".arrow"
+
+
+# path -> (version, frame) of the last parse. A new version replaces the
+# old entry, so edited files never keep stale frames alive.
+_csv_frames = {}
+# store path -> (version, {columns: frame}), the projections of one version
+_store_frames = {}
+
+
+def _read_csv(path, version, dtypes):
+    cached = _csv_frames.get(path)
+    if cached is None or cached[0] != version:
+        # The population CSVs are exported with a UTF-8 BOM on the header row.
+        frame = pd.read_csv(path, encoding="utf-8-sig", dtype=dict(dtypes))
+        cached = _csv_frames[path] = (version, frame)
+    return cached[1]
+
+
+def _read_store(path, version, columns=None):
+    cached = _store_frames.get(path)
+    if cached is None or cached[0] != version:
+        cached = _store_frames[path] = (version, {})
+    projections = cached[1]
+    if columns not in projections:
+        # Uncompressed Arrow IPC is memory-mapped, so only the pages backing
+        # the requested columns are ever read from disk.
+        table = feather.read_table(path, columns=columns and list(columns), memory_map=True)
+        projections[columns] = table.to_pandas(split_blocks=True)
+    return projections[columns]
+
+
+def _has_store(path):
+    store = store_path(path)
+    return (feather is not None and os.path.exists(store)
+            and os.stat(store).st_mtime_ns >= os.stat(path).st_mtime_ns)
+
+
+def write_store(path, dtypes):
+    """Convert one CSV into its columnar store next to it."""
+    frame = _read_csv(path, _version(path), tuple(sorted(dtypes.items())))
+    feather.write_feather(frame, store_path(path), compression="uncompressed")
+
+
+def _load(path, dtypes, columns=None):
+    columns = tuple(columns) if columns is not None else None
+    if _has_store(path):
+        store = store_path(path)
+        frame = _read_store(store, _version(store), columns)
+    else:
+        # The whole file is parsed once per version; columns are picked from it
+        frame = _read_csv(path, _version(path), tuple(sorted(dtypes.items())))
+        if columns is not None:
+            frame = frame[list(columns)]
+    # Pages get a shallow copy: it shares the cached buffers, but adding or
+    # replacing columns on it never touches the cached frame.
+    return frame.copy(deep=False)
+
+
+def populations():
+    """Return the names of the population datasets found in DATA_DIR."""
+    return tuple(sorted(os.path.splitext(entry)[0] for entry in os.listdir(DATA_DIR)
+                        if entry.endswith(".csv")))
+
+
+def dataset_version():
+    """Return a key that changes whenever a population file is added or edited."""
+    names = populations()
+    return names, tuple(_version(population_path(name)) for name in names)
+
+
+@lru_cache(maxsize=None)
+def _file_digest(path, version):
+    with open(path, "rb") as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+
+def dataset_hash():
+    """Return a digest of the names and contents of every population file.
+
+    Files are only re-hashed when their (mtime, size) version changes.
+    """
+    digest = hashlib.sha1()
+    for name, version in zip(*dataset_version()):
+        digest.update(name.encode())
+        digest.update(_file_digest(population_path(name), version).encode())
+    return digest.hexdigest()
+
+
+def population_path(name):
+    return os.path.join(DATA_DIR, f"{name}.csv")
+
+
+def population_dtypes(name):
+    # Labels repeat on every row, so they are stored as categoricals
+    return {name: "category", STATE_COLUMN: "category", **TRAIT_DTYPES}
+
+
+def load_population(name, columns=None):
+    """Return the dataset for one population, parsed once per file version.
+
+    Pass ``columns`` to read only the fields a page needs.
+    """
+    return _load(population_path(name), population_dtypes(name), columns)
+
+
+@lru_cache(maxsize=1)
+def _groups(names, versions):
+    # Built with every column once per dataset version; only the current
+    # version is kept.
+    parts = []
+    for name in names:
+        part = load_population(name, columns=[name, STATE_COLUMN, *TRAITS])
+        parts.append(part.rename(columns={name: "gender", STATE_COLUMN: "state"}))
+    labels = {column: union_categoricals([part[column] for part in parts], sort_categories=True)
+              for column in ("gender", "state")}
+    frame = pd.concat([part.drop(columns=list(labels)) for part in parts], ignore_index=True)
+    frame = frame.assign(**labels)
+    # The group key is stored once as categorical codes rather than as one
+    # repeated string per row.
+    codes = np.repeat(np.arange(len(parts)), [len(part) for part in parts])
+    frame["group"] = pd.Categorical.from_codes(codes, categories=list(names))
+    return frame[[*GROUP_KEYS, *TRAITS]]
+
+
+def load_groups(columns=GROUP_COLUMNS):
+    """Return the long-form table of all population groups.
+
+    It is derived from the per-population datasets, one row per individual
+    keyed by ``group`` (the population), ``gender`` and mating ``state``,
+    and rebuilt only when one of the population files changes.
+    """
+    names, versions = dataset_version()
+    return _groups(names, versions)[list(columns)].copy(deep=False)
+
+
+# Read-only analysis inputs: ``levels`` and integer ``codes`` of every group
+# key, and a float64 matrix of every trait (one column per TRAITS entry).
+ModelInputs = namedtuple("ModelInputs", ["levels", "codes", "values"])
+
+
+@lru_cache(maxsize=4)
+def _model_inputs(names, versions):
+    frame = _groups(names, versions)
+    levels, codes = {}, {}
+    for key in GROUP_KEYS:
+        codes[key], uniques = pd.factorize(frame[key], sort=True, use_na_sentinel=False)
+        codes[key].flags.writeable = False
+        levels[key] = tuple(uniques)
+    values = frame[list(TRAITS)].to_numpy(dtype="float64", na_value=np.nan)
+    values.flags.writeable = False
+    return ModelInputs(levels, codes, values)
+
+
+def model_inputs():
+    """Return the ``ModelInputs`` of the current dataset version.
+
+    They are built once per version and shared by every analysis; the
+    arrays are read-only, so no caller can change them for the others.
+    """
+    return _model_inputs(*dataset_version())
+
+
+class GroupIndex:
+    """Row positions of every (group, gender, state) cell of ``load_groups``.
+
+    The rows are sorted by cell once, so any selection is a handful of
+    contiguous slices of ``order`` rather than a scan of the whole table.
+    """
+
+    def __init__(self, levels, codes):
+        self.levels = levels
+        cells = np.zeros(len(codes[GROUP_KEYS[0]]), dtype=np.intp)
+        for key in GROUP_KEYS:
+            cells = cells * len(levels[key]) + codes[key]
+        self.shape = tuple(len(self.levels[key]) for key in GROUP_KEYS)
+        self.order = np.argsort(cells, kind="stable")
+        self.offsets = np.searchsorted(cells[self.order], np.arange(np.prod(self.shape) + 1))
+
+    def rows(self, group=None, gender=None, state=None):
+        """Return the sorted row positions of the selected individuals.
+
+        ``None`` selects every level of that key.
+        """
+        selected = []
+        for key, value in zip(GROUP_KEYS, (group, gender, state)):
+            if value is None:
+                selected.append(range(len(self.levels[key])))
+            elif value in self.levels[key]:
+                selected.append([self.levels[key].index(value)])
+            else:
+                return np.empty(0, dtype=np.intp)
+        cells = np.ravel_multi_index(np.ix_(*selected), self.shape).ravel()
+        slices = [self.order[self.offsets[cell]:self.offsets[cell + 1]] for cell in cells]
+        return np.sort(np.concatenate([np.empty(0, dtype=np.intp), *slices]))
+
+
+@lru_cache(maxsize=4)
+def _group_index(names, versions):
+    inputs = _model_inputs(names, versions)
+    return GroupIndex(inputs.levels, inputs.codes)
+
+
+def group_index():
+    """Return the ``GroupIndex`` of the current dataset version."""
+    return _group_index(*dataset_version())
+
+
+def select_groups(columns=GROUP_COLUMNS, group=None, gender=None, state=None):
+    """Return the rows of ``load_groups`` for one population, gender and/or state.
+
+    The rows come from the precomputed ``group_index``, so selecting k
+    individuals costs O(k) whatever the size of the table.
+    """
+    return load_groups(columns).take(group_index().rows(group, gender, state))
+
+
+def memory_report():
+    """Return the rows and in-memory size of every loaded population dataset."""
+    report = []
+    for name in populations():
+        frame = load_population(name)
+        size = frame.memory_usage(deep=True, index=False).sum()
+        report.append((name, len(frame), size / 2 ** 20, size / max(len(frame), 1)))
+    return pd.DataFrame(report, columns=["Dataset", "Rows", "Memory (MiB)", "Bytes per row"])
+
+
+def convert_all():
+    """Write the columnar store for every population."""
+    if feather is None:
+        raise ImportError("pyarrow is required to build the columnar store")
+    for name in populations():
+        write_store(population_path(name), population_dtypes(name))
@@ -0,0 +1,190 @@
+import hashlib
+import io
+import multiprocessing
+import os
+import threading
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from mosquitoteam.data import TRAITS, dataset_hash, load_population, populations
+from mosquitoteam.figures import build_figure, group_colors
+from mosquitoteam.lazy import lazy_import
+
+pio = lazy_import("plotly.io")
+
+IMAGE_OPTIONS = dict(width=800, height=600, scale=2)
+MAX_CACHED_IMAGES = 64
+# Seconds the warm renderer gets to answer a test render
+RENDERER_TIMEOUT = 15
+# Seconds one render may take, and the time added per figure of a ZIP
+RENDER_TIMEOUT = 60
+SECONDS_PER_FIGURE = 2
+
+_images = OrderedDict()
+_lock = threading.Lock()
+_renderer_started = False
+_pool = None
+
+
+def _timed(timeout, function, *args, **kwargs):
+    # Run ``function`` on a daemon thread, so a renderer that never answers
+    # raises TimeoutError instead of blocking the caller forever
+    outcome = []
+
+    def run():
+        try:
+            outcome.append((True, function(*args, **kwargs)))
+        except Exception as error:
+            outcome.append((False, error))
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if not outcome:
+        raise TimeoutError(f"the figure renderer did not answer within {timeout} s")
+    succeeded, value = outcome[0]
+    if not succeeded:
+        raise value
+    return value
+
+
+def start_renderer():
+    """Keep one headless browser running for every render in this process.
+
+    Without it kaleido >= 1 starts and stops Chrome for each image; older
+    kaleido releases already keep a persistent renderer of their own. The
+    browser runs in a background thread that dies silently when Chrome is
+    missing or fails, so a test render checks it is up; if not, the server
+    is stopped and renders go through plain ``pio.to_image``, which raises
+    kaleido's own error at once.
+    """
+    global _renderer_started
+    with _lock:
+        if _renderer_started:
+            return
+        _renderer_started = True
+    try:
+        import kaleido
+        kaleido.start_sync_server(silence_warnings=True)
+    except (ImportError, AttributeError):
+        return
+    try:
+        _timed(RENDERER_TIMEOUT, pio.to_image, {"data": []}, format="png", width=10, height=10)
+    except Exception:
+        # Stopping only waits for a thread that is already dead or stuck
+        try:
+            _timed(RENDERER_TIMEOUT, kaleido.stop_sync_server, silence_warnings=True)
+        except TimeoutError:
+            pass
+
+
+def figure_image(fig, format="png", spec=None):
+    """Render ``fig`` to image bytes in memory.
+
+    Renders are kept in a small LRU cache keyed by the figure-spec hash, so
+    every session asking for the same figure shares one kaleido call. Pass
+    the figure's JSON as ``spec`` when it is already serialized.
+    """
+    if spec is None:
+        spec = fig.to_json()
+    key = (hashlib.sha1(spec.encode()).hexdigest(), format)
+    start_renderer()
+    with _lock:
+        if key in _images:
+            _images.move_to_end(key)
+            return _images[key]
+    image = _timed(RENDER_TIMEOUT, pio.to_image, fig, format=format, **IMAGE_OPTIONS)
+    with _lock:
+        _images[key] = image
+        while len(_images) > MAX_CACHED_IMAGES:
+            _images.popitem(last=False)
+    return image
+
+
+def _render_spec(spec, format):
+    # The spec was built from a validated figure, no need to validate it again
+    return pio.to_image(spec, format=format, validate=False, **IMAGE_OPTIONS)
+
+
+def renderer_pool(workers=None):
+    """Return the process pool of warm renderers, starting it on first use.
+
+    The pool lives as long as the process, so each worker starts its
+    browser once and reuses it for every later export.
+    """
+    global _pool
+    with _lock:
+        if _pool is None:
+            # spawn, not fork: the Streamlit server process runs many threads
+            _pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                                        mp_context=multiprocessing.get_context("spawn"),
+                                        initializer=start_renderer)
+        return _pool
+
+
+def report_figures(traits=TRAITS, num_bins=5):
+    """Yield ``(file name, figure)`` for every plot the pages can show."""
+    names = populations()
+    for name in names:
+        genders = load_population(name, columns=[name])[name].unique()
+        for trait in traits:
+            yield f"{name}/{trait}_by_gender", build_figure("gender_box", name, trait).figure
+            for gender in genders:
+                yield (f"{name}/{trait}_{gender}",
+                       build_figure("gender_histogram", name, trait, gender, num_bins).figure)
+    colors = group_colors(names)
+    for trait in traits:
+        yield f"groups/{trait}_box", build_figure("group_box", trait=trait, colors=colors).figure
+        yield f"groups/{trait}_strip", build_figure("group_strip", trait=trait, colors=colors).figure
+        for group_name in names:
+            yield (f"groups/{trait}_{group_name}",
+                   build_figure("group_histogram", group_name, trait, bins=num_bins,
+                                colors={group_name: colors[group_name]}).figure)
+
+
+def write_zip(figures, file, format="png", workers=None):
+    """Render ``(file name, figure)`` pairs in the renderer pool into one ZIP.
+
+    Images are written to ``file`` (a path or binary file object) in order,
+    each as soon as it is rendered, so the archive is never held twice.
+    """
+    names, specs = [], []
+    for name, fig in figures:
+        names.append(f"{name}.{format}")
+        specs.append(fig.to_dict())
+    # PNG is already compressed, deflating it again only costs time
+    compression = zipfile.ZIP_STORED if format == "png" else zipfile.ZIP_DEFLATED
+    pool = renderer_pool(workers)
+    with zipfile.ZipFile(file, "w", compression=compression) as archive:
+        images = pool.map(_render_spec, specs, [format] * len(specs), chunksize=8,
+                          timeout=RENDER_TIMEOUT + SECONDS_PER_FIGURE * len(specs))
+        try:
+            for name, image in zip(names, images):
+                archive.writestr(name, image)
+        except Exception:
+            # Stuck or failed workers are not reused for the next export
+            shutdown_pool()
+            raise
+
+
+def shutdown_pool():
+    """Stop the renderer pool; the next export starts a fresh one."""
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+@lru_cache(maxsize=2)
+def _report_zip(digest, format):
+    buffer = io.BytesIO()
+    write_zip(report_figures(), buffer, format)
+    return buffer.getvalue()
+
+
+def report_zip(format="png"):
+    """Return every report figure as a ZIP, rebuilt only when the data changes."""
+    return _report_zip(dataset_hash(), format)
@@ -0,0 +1,266 @@
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+from mosquitoteam.data import dataset_hash, load_groups, select_groups
+from mosquitoteam.lazy import lazy_import
+from mosquitoteam.outliers import outlier_rows
+from mosquitoteam.stats import box_stats, point_sample, trait_histograms
+
+colors = lazy_import("plotly.colors")
+go = lazy_import("plotly.graph_objects")
+
+# A built figure together with its serialized spec
+BuiltFigure = namedtuple("BuiltFigure", ["figure", "json"])
+
+# Most points drawn per group; outliers are always drawn on top of these
+POINTS_PER_GROUP = 1000
+GENDER_COLORS = ['rgb(107,174,214)', '#7201a8', 'rgb(255,127,14)']
+# gender -> (bar color, bar outline color) of the histograms
+HISTOGRAM_COLORS = {
+    "Male": ('rgb(107,174,214)', 'rgb(8,81,156)'),
+    "Female": ('#7201a8', '#380340'),
+}
+DEFAULT_GROUP_COLORS = {
+    'J06_No_Irrad': '#09387D',
+    'J06_Irrad': '#08519C',
+    'WildType_Yaviza': '#6BAED6'
+}
+
+
+def group_colors(names):
+    """Return the default color of every population group."""
+    palette = colors.qualitative.Plotly
+    return {name: DEFAULT_GROUP_COLORS.get(name, palette[i % len(palette)])
+            for i, name in enumerate(names)}
+
+
+def point_traces(data, by, trait, colors, shown, offset=0.0, jitter=0.3):
+    """WebGL scatter traces of the ``shown`` rows, one per group.
+
+    Group ``i`` is drawn around x = i + ``offset``, jittered server-side.
+    """
+    rows = data.loc[shown, [by, trait]]
+    rng = np.random.default_rng(0)
+    traces = []
+    for i, group in enumerate(colors):
+        y = rows.loc[rows[by] == group, trait].to_numpy(dtype="float64", na_value=np.nan)
+        traces.append(go.Scattergl(
+            x=i + offset + jitter * (rng.random(len(y)) - 0.5),
+            y=y,
+            mode='markers',
+            name=group,
+            legendgroup=group,
+            showlegend=False,
+            marker_color=colors[group],
+            marker_size=4
+        ))
+    return traces
+
+
+def box_traces(data, by, trait, colors, points="sample", offset=0.0):
+    """Box plots drawn from server-side quartiles, one per group.
+
+    Only the outliers, plus a stratified sample of the other points when
+    ``points="sample"``, are sent to the browser.
+    """
+    summary, outliers = box_stats(data, by, trait)
+    shown = outliers
+    if points == "sample":
+        present = data[trait].notna()
+        shown = outliers | (point_sample(data.loc[present, by], POINTS_PER_GROUP)
+                            .reindex(data.index, fill_value=False))
+    traces = []
+    for i, group in enumerate(colors):
+        stats = summary.loc[group]
+        traces.append(go.Box(
+            x=[i],
+            q1=[stats["q1"]],
+            median=[stats["median"]],
+            q3=[stats["q3"]],
+            lowerfence=[stats["lowerfence"]],
+            upperfence=[stats["upperfence"]],
+            name=group,
+            legendgroup=group,
+            boxpoints=False,
+            marker_color=colors[group],
+            line_color=colors[group]
+        ))
+    return traces + point_traces(data, by, trait, colors, shown, offset)
+
+
+def group_axis(names):
+    """Category labels for the numeric x positions of the groups."""
+    return dict(tickmode='array', tickvals=list(range(len(names))), ticktext=list(names))
+
+
+def highlight_trace(data, by, trait, groups, flagged, label):
+    """Marks over the ``flagged`` rows, drawn on the box of their group."""
+    rows = data.loc[flagged, [by, trait]]
+    position = rows[by].map({group: i for i, group in enumerate(groups)}).astype("float64")
+    return go.Scattergl(
+        x=position,
+        y=rows[trait],
+        mode='markers',
+        name=label,
+        marker=dict(symbol='x', size=9, color='rgb(214,39,40)')
+    )
+
+
+def gender_box(data, name, trait, highlight=None, highlight_label="Outliers"):
+    """Box plot of ``trait`` by gender for population ``name``.
+
+    ``data`` holds the population's rows of ``load_groups``; the rows of the
+    boolean mask ``highlight`` are marked on their box.
+    """
+    genders = data["gender"].dropna().unique()
+    colors = {gender: GENDER_COLORS[i % len(GENDER_COLORS)] for i, gender in enumerate(genders)}
+    fig = go.Figure(box_traces(data, "gender", trait, colors, offset=-0.45))
+    if highlight is not None:
+        fig.add_trace(highlight_trace(data, "gender", trait, colors, highlight, highlight_label))
+    fig.update_layout(
+        title={
+            'text': f"{trait} by Gender",
+            'x': 0.5,
+            'xanchor': 'center'
+        },
+        xaxis_title="Gender",
+        xaxis=group_axis(colors),
+        yaxis_title=trait,
+        annotations=[
+            dict(
+                xref='paper',
+                yref='paper',
+                x=0.5,
+                y=-0.3,
+                showarrow=False,
+                text=f"Figure 1 shows boxplots of {trait} by gender for the {name} population, with males (left panel) and females (right panel).",
+            )
+        ]
+    )
+    return fig
+
+
+def histogram_bars(edges, counts):
+    """Bar trace drawing pre-binned histogram counts."""
+    edges = np.asarray(edges)
+    return go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges))
+
+
+def gender_histogram(edges, counts, trait, gender):
+    """Histogram of ``trait`` for the individuals of one gender."""
+    color, line_color = HISTOGRAM_COLORS.get(gender, (GENDER_COLORS[0], GENDER_COLORS[0]))
+    fig = go.Figure(histogram_bars(edges, counts))
+    fig.update_traces(marker_color=color,
+                      marker_line_color=color,
+                      marker_line_width=2,
+                      marker_line=dict(width=2, color=line_color),
+                      opacity=0.6)
+    fig.update_layout(xaxis_title=trait,
+                      yaxis_title="Frequency",
+                      title={
+                          'text': f"{trait} for {gender}",
+                          'x': 0.5,
+                          'xanchor': 'center'
+                      },
+                      bargap=0,
+                      width=600,
+                      height=500)
+    return fig
+
+
+def group_box(data, trait, colors):
+    """Box plot comparing ``trait`` across the population groups."""
+    fig = go.Figure(box_traces(data, "group", trait, colors, points="outliers"))
+    fig.update_layout(
+        title={
+            'text': f"Comparison of {trait} by Population Group",
+            'x': 0.5,
+            'xanchor': 'center'
+        },
+        xaxis_title="Group",
+        xaxis=group_axis(colors),
+        yaxis_title=trait,
+        width=750,
+        height=650,
+    )
+    return fig
+
+
+def group_strip(data, trait, colors):
+    """Strip plot of ``trait`` across the population groups.
+
+    Large groups are shown through a stratified sample of their points.
+    """
+    present = data[trait].notna()
+    shown = point_sample(data.loc[present, "group"], POINTS_PER_GROUP).reindex(data.index, fill_value=False)
+    fig = go.Figure(point_traces(data, "group", trait, colors, shown, jitter=0.6))
+    fig.update_traces(showlegend=True)
+    fig.update_layout(
+        title={
+            'text': f"Spread of {trait} Across Population Groups",
+            'x': 0.5,
+            'xanchor': 'center'
+        },
+        xaxis_title="Group",
+        xaxis=group_axis(colors),
+        yaxis_title=trait,
+        legend_title_text="group",
+        width=600,
+        height=500,
+    )
+    return fig
+
+
+def group_histogram(edges, counts, trait, group_name, color):
+    """Histogram of ``trait`` for one population group."""
+    fig = go.Figure(histogram_bars(edges, counts))
+    fig.update_traces(marker_color=color,
+                      marker_line_color=color,
+                      marker_line_width=2,
+                      opacity=0.6)
+    fig.update_layout(width=450, height=400, showlegend=False, bargap=0,
+                      xaxis_title=trait, yaxis_title="count",
+                      title=f'Distribution of {trait} for {group_name}', title_x=0.5,
+                      title_xanchor='center')
+    return fig
+
+
+@lru_cache(maxsize=256)
+def _built_figure(digest, kind, population, trait, gender, bins, colors, state, outliers):
+    colors = dict(colors) if colors is not None else None
+    if kind == "gender_box":
+        data = select_groups(["gender", trait], population, state=state)
+        highlight = None
+        if outliers is not None:
+            # select_groups keeps the load_groups row positions as the index
+            highlight = data.index.isin(outlier_rows(outliers, trait, state))
+        fig = gender_box(data, population, trait, highlight, f"{outliers} outliers")
+    elif kind == "gender_histogram":
+        fig = gender_histogram(*trait_histograms(trait, population, gender, state)[bins], trait, gender)
+    elif kind == "group_box":
+        fig = group_box(load_groups(columns=["group", trait]), trait, colors)
+    elif kind == "group_strip":
+        fig = group_strip(load_groups(columns=["group", trait]), trait, colors)
+    elif kind == "group_histogram":
+        fig = group_histogram(*trait_histograms(trait, population)[bins], trait, population, colors[population])
+    else:
+        raise ValueError(f"unknown figure kind: {kind!r}")
+    return BuiltFigure(fig, fig.to_json())
+
+
+def build_figure(kind, population=None, trait=None, gender=None, bins=None, colors=None, state=None,
+                 outliers=None):
+    """Return the ``BuiltFigure`` of one chart of the app.
+
+    ``outliers`` names a method of ``outliers.METHODS`` whose flagged values
+    the box plot marks. Figures are built once per (population, trait,
+    gender, bins, colors, mating state, outliers) and dataset version and
+    kept in an LRU cache with their JSON, so every view and every session
+    showing the same chart shares one figure. Callers must not modify the
+    returned figure.
+    """
+    if colors is not None:
+        colors = tuple(colors.items())
+    return _built_figure(dataset_hash(), kind, population, trait, gender, bins, colors, state, outliers)
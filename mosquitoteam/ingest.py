@@ -0,0 +1,225 @@
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from mosquitoteam import data
+from mosquitoteam.data import (STATE_COLUMN, TRAIT_DTYPES, TRAITS, dataset_hash, load_population, model_inputs,
+                               population_path)
+from mosquitoteam.stats import anova_from_sums
+
+STATE_FILE = "ingest_state.npz"
+
+
+class IngestState:
+    """Running statistics of every (population, gender) cell and trait.
+
+    Count, mean and M2 are updated with the batched form of Welford's
+    algorithm (Chan et al.), so any batch of new rows is merged without
+    revisiting old ones.
+    """
+
+    def __init__(self):
+        self.digest = None
+        self.cells = []
+        self.count = np.zeros((0, len(TRAITS)))
+        self.mean = np.zeros((0, len(TRAITS)))
+        self.m2 = np.zeros((0, len(TRAITS)))
+
+    def _cell(self, population, gender):
+        key = (population, gender)
+        if key not in self.cells:
+            self.cells.append(key)
+            empty = np.zeros((1, len(TRAITS)))
+            self.count = np.vstack([self.count, empty])
+            self.mean = np.vstack([self.mean, empty])
+            self.m2 = np.vstack([self.m2, empty])
+        return self.cells.index(key)
+
+    def update(self, population, genders, values):
+        """Merge new rows: their gender labels and an (rows, TRAITS) value matrix."""
+        genders = np.asarray(genders, dtype=object)
+        for gender in pd.unique(genders):
+            batch = values[genders == gender]
+            present = ~np.isnan(batch)
+            count = present.sum(axis=0)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                mean = np.where(count > 0, np.nansum(batch, axis=0) / count, 0.0)
+            m2 = np.nansum((batch - mean) ** 2, axis=0)
+
+            cell = self._cell(population, gender)
+            total = self.count[cell] + count
+            delta = mean - self.mean[cell]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                share = np.where(total > 0, count / total, 0.0)
+            self.m2[cell] += m2 + delta ** 2 * self.count[cell] * share
+            self.mean[cell] += delta * share
+            self.count[cell] = total
+
+    def moments(self, trait, population=None):
+        """Return count, mean and M2 of ``trait`` like ``stats.population_moments``.
+
+        Rows are the genders of ``population``, or the populations when it is
+        None, so the result feeds ``one_way_anova`` and ``tukey_hsd``.
+        """
+        column = TRAITS.index(trait)
+        cells = pd.DataFrame(self.cells, columns=["population", "gender"])
+        cells["count"] = self.count[:, column]
+        cells["mean"] = self.mean[:, column]
+        cells["M2"] = self.m2[:, column]
+        if population is not None:
+            return cells[cells["population"] == population].set_index("gender")[["count", "mean", "M2"]]
+        # Merge the gender cells of each population
+        cells["sum"] = cells["count"] * cells["mean"]
+        merged = cells.groupby("population", sort=True)[["count", "sum"]].sum()
+        merged["mean"] = merged["sum"] / merged["count"]
+        spread = cells["count"] * (cells["mean"] - cells["population"].map(merged["mean"])) ** 2
+        merged["M2"] = (cells["M2"] + spread).groupby(cells["population"]).sum()
+        return merged[["count", "mean", "M2"]].rename_axis("group")
+
+    def gender_anovas(self):
+        """Return the gender ANOVA of every population and trait from the running sums.
+
+        The table is laid out like ``stats.gender_anovas``.
+        """
+        populations = sorted({population for population, _ in self.cells})
+        genders = sorted({gender for _, gender in self.cells})
+        shape = (len(populations), len(genders), len(TRAITS))
+        count, mean, m2 = np.zeros(shape), np.zeros(shape), np.zeros(shape)
+        for cell, (population, gender) in enumerate(self.cells):
+            index = populations.index(population), genders.index(gender)
+            count[index], mean[index], m2[index] = self.count[cell], self.mean[cell], self.m2[cell]
+        # anova_from_sums takes sums of values centred on any constant per
+        # population; its mean keeps them well conditioned
+        with np.errstate(divide="ignore", invalid="ignore"):
+            centre = (count * mean).sum(axis=1, keepdims=True) / count.sum(axis=1, keepdims=True)
+        deviation = np.where(count > 0, mean - centre, 0.0)
+        return anova_from_sums(populations, TRAITS, count, count * deviation, m2 + count * deviation ** 2)
+
+    def save(self, path):
+        """Persist the state as one ``.npz`` file."""
+        # Written aside and renamed, so a crash never leaves a half-written state
+        with open(f"{path}.tmp", "wb") as file:
+            np.savez(file, digest=self.digest, cells=np.array(self.cells, dtype=str).reshape(-1, 2),
+                     count=self.count, mean=self.mean, m2=self.m2)
+        os.replace(f"{path}.tmp", path)
+
+    @classmethod
+    def load(cls, path):
+        state = cls()
+        with np.load(path) as saved:
+            state.digest = str(saved["digest"])
+            state.cells = [tuple(cell) for cell in saved["cells"].tolist()]
+            state.count, state.mean, state.m2 = saved["count"], saved["mean"], saved["m2"]
+        return state
+
+
+def state_path():
+    return os.path.join(data.DATA_DIR, STATE_FILE)
+
+
+def rebuild_state():
+    """Build the running statistics from scratch out of the current datasets."""
+    state = IngestState()
+    inputs = model_inputs()
+    populations = np.asarray(inputs.levels["group"], dtype=object)[inputs.codes["group"]]
+    genders = np.asarray(inputs.levels["gender"], dtype=object)[inputs.codes["gender"]]
+    for population in inputs.levels["group"]:
+        rows = populations == population
+        state.update(population, genders[rows], inputs.values[rows])
+    state.digest = dataset_hash()
+    return state
+
+
+@lru_cache(maxsize=1)
+def _saved_state(path, version, digest):
+    state = IngestState.load(path)
+    return state if state.digest == digest else None
+
+
+def saved_state():
+    """Return the persisted running statistics if they match the current data, else None.
+
+    Unlike ``load_state`` nothing is rebuilt, so no population file is parsed;
+    the analyses use this to answer from the sums right after an ingest.
+    """
+    path = state_path()
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return _saved_state(path, (stat.st_mtime_ns, stat.st_size), dataset_hash())
+
+
+def load_state():
+    """Return the persisted running statistics.
+
+    They are rebuilt (and saved again) when missing or when the population
+    files were changed by anything but ``ingest``.
+    """
+    path = state_path()
+    if os.path.exists(path):
+        state = IngestState.load(path)
+        if state.digest == dataset_hash():
+            return state
+    state = rebuild_state()
+    state.save(path)
+    return state
+
+
+def checked_rows(name, rows):
+    """Return new ``rows`` of population ``name`` typed like ``population_dtypes``.
+
+    Raises ValueError, before anything is written, for missing columns,
+    gender or state labels the population does not have yet, missing or
+    non-integer wingbeat counts and non-numeric measurements.
+    """
+    path = population_path(name)
+    columns = pd.read_csv(path, encoding="utf-8-sig", nrows=0).columns
+    missing = set(columns) - set(rows.columns)
+    if missing:
+        raise ValueError(f"new rows for {name} lack columns: {', '.join(sorted(missing))}")
+    rows = rows[list(columns)].copy()
+    labels = load_population(name, columns=[name, STATE_COLUMN])
+    for column, label in ((name, "gender"), (STATE_COLUMN, "mating state")):
+        unknown = set(rows[column].dropna()) - set(labels[column].cat.categories)
+        if rows[column].isna().any() or unknown:
+            raise ValueError(f"every new row needs a known {label}"
+                             + (f", not {', '.join(sorted(map(str, unknown)))}" if unknown else ""))
+    for column, dtype in TRAIT_DTYPES.items():
+        values = pd.to_numeric(rows[column], errors="coerce")
+        if values.notna().sum() < rows[column].notna().sum():
+            raise ValueError(f"{column} has non-numeric values")
+        if pd.api.types.is_integer_dtype(dtype):
+            info = np.iinfo(dtype.lower())
+            if values.isna().any() or (values % 1 != 0).any() or not values.between(info.min, info.max).all():
+                raise ValueError(f"{column} needs a whole number between {info.min} and {info.max} on every row")
+        rows[column] = values.astype(dtype)
+    return rows
+
+
+def ingest(name, rows):
+    """Append new individuals to population ``name`` and update the statistics.
+
+    ``rows`` is a DataFrame with the population's CSV columns, checked with
+    ``checked_rows``. The rows are appended to the CSV, merged into the
+    running statistics without re-reading old rows, and the state is
+    persisted. Returns the state.
+    """
+    rows = checked_rows(name, rows)
+    values = rows[list(TRAITS)].to_numpy(dtype="float64", na_value=np.nan)
+
+    state = load_state()
+    path = population_path(name)
+    with open(path, "rb") as file:
+        ending = "\r\n" if file.readline().endswith(b"\r\n") else "\n"
+        file.seek(-1, os.SEEK_END)
+        terminated = file.read(1) == b"\n"
+    with open(path, "a", encoding="utf-8", newline="") as file:
+        if not terminated:
+            file.write(ending)
+        rows.to_csv(file, header=False, index=False, lineterminator=ending)
+    state.update(name, rows[name].to_numpy(dtype=object), values)
+    state.digest = dataset_hash()
+    state.save(state_path())
+    return state
@@ -0,0 +1,38 @@
+import importlib
+import importlib.util
+import time
+import types
+
+# module name -> seconds its first import took, in load order
+IMPORT_TIMES = {}
+
+
+class LazyModule(types.ModuleType):
+    """Stand-in for a heavy module, imported on first attribute access."""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            started = time.perf_counter()
+            self._module = importlib.import_module(self.__name__)
+            IMPORT_TIMES.setdefault(self.__name__, time.perf_counter() - started)
+        return getattr(self._module, attr)
+
+
+def lazy_import(name, optional=False):
+    """Return a module that is only imported when it is first used.
+
+    With ``optional=True``, return None when the top-level package is not
+    installed, without importing anything.
+    """
+    if optional and importlib.util.find_spec(name.partition(".")[0]) is None:
+        return None
+    return LazyModule(name)
+
+
+def import_report():
+    """Return ``(module, seconds)`` for every lazy module loaded so far."""
+    return list(IMPORT_TIMES.items())
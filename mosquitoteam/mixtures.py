@@ -0,0 +1,264 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from mosquitoteam.data import TRAITS, dataset_hash, model_inputs
+from mosquitoteam.outliers import cell_quantiles
+from mosquitoteam.stats import ALL_GENDERS, model_rows
+
+# Mixtures of 1..MAX_COMPONENTS normal components are compared by BIC
+MAX_COMPONENTS = 3
+MAX_ITERATIONS = 500
+# EM stops once no cell's log-likelihood per value improves by more than this
+TOLERANCE = 1e-6
+# Smallest component variance, as a share of the cell variance, so no
+# component collapses onto a few repeated integer measurements
+VARIANCE_FLOOR = 0.01
+# Uniform samples simulated per sample size for the dip test p-values
+DIP_SIMULATIONS = 2000
+# Sample sizes at which the dip test's null distribution is simulated
+NULL_SIZES = (10, 20, 40, 80, 160, 320)
+
+
+def fit_mixtures(cells, values, size, components):
+    """Fit a mixture of ``components`` normals to the values of every cell by EM.
+
+    ``cells`` numbers the cells 0..size-1 and missing values are ignored.
+    All cells are fitted together, one array operation per EM step; each
+    starts from equal weights and means at evenly spaced quantiles.
+    Returns ``(log-likelihood, weights, means, standard deviations)``, the
+    last three with shape (size, components).
+    """
+    present = ~np.isnan(values)
+    cells, values = cells[present], values[present]
+    count = np.bincount(cells, minlength=size).astype("float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        centre = np.bincount(cells, values, minlength=size) / count
+        scale = np.sqrt(np.bincount(cells, (values - centre[cells]) ** 2, minlength=size) / count)
+    scale = np.where(scale > 0, scale, 1.0)
+    # Standardized within each cell, so one floor and tolerance suit every trait
+    z = (values - centre[cells]) / scale[cells]
+
+    k = components
+    slots = (cells[:, None] * k + np.arange(k)).ravel()
+    weights = np.full((size, k), 1 / k)
+    means = np.column_stack(cell_quantiles(cells, z, size, (np.arange(k) + 0.5) / k))
+    variances = np.ones((size, k))
+    previous = np.full(size, -np.inf)
+    for _ in range(MAX_ITERATIONS):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            log_density = (np.log(weights[cells]) - 0.5 * np.log(2 * np.pi * variances[cells])
+                           - (z[:, None] - means[cells]) ** 2 / (2 * variances[cells]))
+        peak = log_density.max(axis=1, keepdims=True)
+        log_sum = peak[:, 0] + np.log(np.exp(log_density - peak).sum(axis=1))
+        responsibility = np.exp(log_density - log_sum[:, None])
+        likelihood = np.bincount(cells, log_sum, minlength=size)
+        with np.errstate(invalid="ignore"):
+            if not (likelihood - previous > TOLERANCE * count).any():
+                break
+        previous = likelihood
+
+        mass = np.bincount(slots, responsibility.ravel(), minlength=size * k).reshape(size, k)
+        # A component left without values keeps its last mean and variance
+        held = np.where(mass > 0, mass, 1.0)
+        weights = mass / np.maximum(count, 1)[:, None]
+        means = np.where(mass > 0, np.bincount(slots, (responsibility * z[:, None]).ravel(),
+                                               minlength=size * k).reshape(size, k) / held, means)
+        spread = np.bincount(slots, (responsibility * (z[:, None] - means[cells]) ** 2).ravel(),
+                             minlength=size * k).reshape(size, k) / held
+        variances = np.where(mass > 0, np.fmax(spread, VARIANCE_FLOOR), variances)
+    # Back to the original units; the Jacobian of the scaling enters the likelihood
+    likelihood = np.where(count > 0, likelihood - count * np.log(scale), np.nan)
+    return likelihood, weights, centre[:, None] + means * scale[:, None], np.sqrt(variances) * scale[:, None]
+
+
+def dip_statistic(values):
+    """Hartigan's dip statistic of a sample, the distance to the closest unimodal distribution.
+
+    A port of the algorithm of Hartigan and Hartigan (1985), as in the R
+    package diptest. Missing values are ignored.
+    """
+    x = np.sort(values[~np.isnan(values)])
+    n = len(x)
+    if n < 2 or x[0] == x[-1]:
+        return 0.5 / max(n, 1)
+    # 1-based indices below, as in the original algorithm; plain lists, as
+    # the loops touch one element at a time
+    values = np.r_[np.nan, x]
+    x = values.tolist()
+    # Change points of the greatest convex minorant and least concave majorant
+    mn = [0] * (n + 1)
+    mj = [0] * (n + 1)
+    mn[1] = 1
+    for j in range(2, n + 1):
+        mn[j] = j - 1
+        while True:
+            mnj = mn[j]
+            mnmnj = mn[mnj]
+            if mnj == 1 or (x[j] - x[mnj]) * (mnj - mnmnj) < (x[mnj] - x[mnmnj]) * (j - mnj):
+                break
+            mn[j] = mnmnj
+    mj[n] = n
+    for k in range(n - 1, 0, -1):
+        mj[k] = k + 1
+        while True:
+            mjk = mj[k]
+            mjmjk = mj[mjk]
+            if mjk == n or (x[k] - x[mjk]) * (mjk - mjmjk) < (x[mjk] - x[mjmjk]) * (k - mjk):
+                break
+            mj[k] = mjmjk
+
+    dip, low, high = 1.0, 1, n
+    while True:
+        gcm = [None, high]
+        while gcm[-1] > low:
+            gcm.append(mn[gcm[-1]])
+        lcm = [None, low]
+        while lcm[-1] < high:
+            lcm.append(mj[lcm[-1]])
+        l_gcm, l_lcm = len(gcm) - 1, len(lcm) - 1
+        ig, ih = l_gcm, l_lcm
+
+        # Largest distance between the minorant and the majorant
+        d = 0.0
+        if l_gcm != 2 or l_lcm != 2:
+            ix, iv = l_gcm - 1, 2
+            while True:
+                gcmix, lcmiv = gcm[ix], lcm[iv]
+                if gcmix > lcmiv:
+                    gcmi1 = gcm[ix + 1]
+                    dx = (lcmiv - gcmi1 + 1) - (x[lcmiv] - x[gcmi1]) * (gcmix - gcmi1) / (x[gcmix] - x[gcmi1])
+                    iv += 1
+                    if dx >= d:
+                        d, ig, ih = dx, ix + 1, iv - 1
+                else:
+                    lcmiv1 = lcm[iv - 1]
+                    dx = (x[gcmix] - x[lcmiv1]) * (lcmiv - lcmiv1) / (x[lcmiv] - x[lcmiv1]) - (gcmix - lcmiv1 - 1)
+                    ix -= 1
+                    if dx >= d:
+                        d, ig, ih = dx, ix + 1, iv
+                ix = max(ix, 1)
+                iv = min(iv, l_lcm)
+                if gcm[ix] == lcm[iv]:
+                    break
+        else:
+            d = 1.0
+        if d < dip:
+            break
+
+        # Dips of the minorant and the majorant over the current modal interval
+        dip_l = 0.0
+        for j in range(ig, l_gcm):
+            jb, je = gcm[j], gcm[j + 1]
+            largest = 1.0
+            if jb - je > 1 and x[jb] != x[je]:
+                run = np.arange(je, jb + 1)
+                largest = max(largest, ((run - je + 1) - (values[run] - x[je]) * (jb - je) / (x[jb] - x[je])).max())
+            dip_l = max(dip_l, largest)
+        dip_u = 0.0
+        for j in range(ih, l_lcm):
+            jb, je = lcm[j + 1], lcm[j]
+            largest = 1.0
+            if jb - je > 1 and x[jb] != x[je]:
+                run = np.arange(je, jb + 1)
+                largest = max(largest, ((values[run] - x[je]) * (jb - je) / (x[jb] - x[je]) - (run - je - 1)).max())
+            dip_u = max(dip_u, largest)
+        dip = max(dip, dip_l, dip_u)
+
+        if low == gcm[ig] and high == lcm[ih]:
+            break
+        low, high = gcm[ig], lcm[ih]
+    return dip / (2 * n)
+
+
+@lru_cache(maxsize=64)
+def null_dips(n, simulations=DIP_SIMULATIONS, seed=0):
+    """Sorted sqrt(n) * dip of ``simulations`` uniform samples of size ``n``.
+
+    The uniform is the least favourable unimodal distribution, so these
+    give the dip test's null distribution; they are simulated once per size.
+    """
+    rng = np.random.default_rng([seed, n])
+    return np.sort([np.sqrt(n) * dip_statistic(sample) for sample in rng.random((simulations, n))])
+
+
+def dip_test(values, simulations=DIP_SIMULATIONS, seed=0):
+    """Return Hartigan's dip and its p-value against unimodality.
+
+    The null distribution is simulated at the ``NULL_SIZES`` only and the
+    p-value interpolated in log n, since sqrt(n) * dip hardly depends on n;
+    samples beyond the largest size use its distribution.
+    """
+    dip = dip_statistic(values)
+    n = int((~np.isnan(values)).sum())
+    p_values = []
+    for size in NULL_SIZES:
+        null = null_dips(size, simulations, seed)
+        exceed = len(null) - np.searchsorted(null, np.sqrt(n) * dip, side="left")
+        p_values.append((exceed + 1) / (len(null) + 1))
+    return dip, np.interp(np.log(max(n, 1)), np.log(NULL_SIZES), p_values)
+
+
+def screen_mixtures(cells, values, size, simulations=DIP_SIMULATIONS, seed=0):
+    """Test every cell of ``values`` for subgroups.
+
+    Mixtures of 1..``MAX_COMPONENTS`` normals are fitted to all cells in a
+    batch, the number of components with the lowest BIC is selected, and
+    each cell gets Hartigan's dip test. Returns one row per cell.
+    """
+    count = np.bincount(cells[~np.isnan(values)], minlength=size)
+    bic, fits = [], []
+    for k in range(1, MAX_COMPONENTS + 1):
+        likelihood, *fit = fit_mixtures(cells, values, size, k)
+        with np.errstate(divide="ignore"):
+            bic.append(-2 * likelihood + (3 * k - 1) * np.log(count))
+        fits.append(fit)
+    bic = np.column_stack(bic)
+    best = np.argmin(np.where(np.isnan(bic), np.inf, bic), axis=1)
+
+    order = np.argsort(cells, kind="stable")
+    groups = np.split(values[order], np.cumsum(np.bincount(cells, minlength=size))[:-1])
+    dips = [dip_test(group, simulations, seed) if n > 0 else (np.nan, np.nan)
+            for group, n in zip(groups, count)]
+
+    frame = pd.DataFrame({"count": count, "dip": [dip for dip, _ in dips],
+                          "dip p-value": [p for _, p in dips]})
+    for k in range(1, MAX_COMPONENTS + 1):
+        frame[f"BIC {k}"] = bic[:, k - 1]
+    frame["components"] = np.where(count > 0, best + 1, 0)
+    for column, name in enumerate(("weights", "means", "sds")):
+        # Components of the selected mixture, by increasing mean
+        frame[name] = [tuple(fits[k][column][cell][np.argsort(fits[k][1][cell])].tolist()) if count[cell] else ()
+                       for cell, k in enumerate(best)]
+    return frame
+
+
+def _cell_screen(cells, values, size, simulations, seed):
+    # Every (cell, trait) at once, the trait folded into the cell number
+    rows, traits = values.shape
+    flat_cells = (np.arange(traits)[:, None] * size + cells).ravel()
+    frame = screen_mixtures(flat_cells, values.T.ravel(), size * traits, simulations, seed)
+    # Reorder from trait-major to cell-major rows
+    return frame.iloc[(np.arange(size)[:, None] + np.arange(traits)[None, :] * size).ravel()]
+
+
+@lru_cache(maxsize=8)
+def _mixture_screen(digest, state, simulations, seed):
+    levels = model_inputs().levels
+    groups, genders, values = model_rows(state)
+    by_gender = _cell_screen(groups * len(levels["gender"]) + genders, values,
+                             len(levels["group"]) * len(levels["gender"]), simulations, seed)
+    by_gender.index = pd.MultiIndex.from_product([levels["group"], levels["gender"], TRAITS])
+    by_population = _cell_screen(groups, values, len(levels["group"]), simulations, seed)
+    by_population.index = pd.MultiIndex.from_product([levels["group"], [ALL_GENDERS], TRAITS])
+    return pd.concat([by_gender, by_population]).rename_axis(["population", "gender", "trait"])
+
+
+def mixture_screen(state=None, simulations=DIP_SIMULATIONS, seed=0):
+    """Screen every (population, gender, trait) for subgroups with ``screen_mixtures``.
+
+    Rows are indexed like ``narratives.distribution_stats`` and computed once
+    per dataset version, state and dip test setting.
+    """
+    return _mixture_screen(dataset_hash(), state, simulations, seed)
@@ -0,0 +1,143 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from mosquitoteam.data import TRAITS, dataset_hash, model_inputs
+from mosquitoteam.outliers import cell_quantiles, flag_outliers
+from mosquitoteam.stats import ALL_GENDERS, model_rows
+
+# Grid points of the binned kernel density used to count peaks
+DENSITY_BINS = 64
+# A peak must reach this share of the highest one to count as a mode
+PEAK_SHARE = 0.1
+# Outlier values listed in a description before the rest are summed up
+LISTED_OUTLIERS = 6
+
+TEMPLATE = ("The distribution {subject} is {shape} and {modality}. The values range from {min:g} to {max:g}, "
+            "with a median of {median:g} and a mean of {mean:.4g}. {outliers}")
+SHAPES = {
+    "symmetric": "approximately symmetric (skewness {skew:.2f})",
+    "slight": "slightly skewed to the {side} (skewness {skew:.2f})",
+    "skewed": "skewed to the {side} (skewness {skew:.2f})",
+}
+MODALITIES = {
+    1: "unimodal",
+    2: "bimodal",
+}
+MULTIMODAL = "multimodal, with {modes} peaks"
+OUTLIERS = {
+    0: "There are no potential outliers beyond 1.5 IQR of the quartiles.",
+    1: "There is one potential outlier: {values}.",
+}
+SEVERAL_OUTLIERS = "There are {count} potential outliers: {values}."
+
+
+def count_modes(cells, values, size, minimum, maximum, count, spread, iqr):
+    """Count the peaks of a kernel density estimate of every cell.
+
+    Values are binned on a grid spanning each cell's range and smoothed
+    with a Gaussian kernel of Silverman's bandwidth, all cells at once.
+    """
+    present = ~np.isnan(values)
+    cells, values = cells[present], values[present]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        width = (maximum - minimum) / DENSITY_BINS
+        position = np.where(width[cells] > 0, (values - minimum[cells]) / width[cells], 0.0)
+        bins = np.minimum(position.astype(np.intp), DENSITY_BINS - 1)
+        histogram = np.bincount(cells * DENSITY_BINS + bins, minlength=size * DENSITY_BINS) \
+            .reshape(size, DENSITY_BINS).astype("float64")
+        bandwidth = 0.9 * np.fmin(spread, iqr / 1.349) * count ** -0.2
+        sigma = np.maximum(np.nan_to_num(bandwidth / width), 0.5)
+    offsets = np.arange(DENSITY_BINS)
+    kernel = np.exp(-0.5 * ((offsets[:, None] - offsets[None, :]) / sigma[:, None, None]) ** 2)
+    density = np.einsum("cj,cij->ci", histogram, kernel)
+    padded = np.pad(density, ((0, 0), (1, 1)), constant_values=-np.inf)
+    peaks = (density > padded[:, :-2]) & (density >= padded[:, 2:]) & \
+        (density >= PEAK_SHARE * density.max(axis=1, keepdims=True))
+    return np.where(count > 0, peaks.sum(axis=1), 0)
+
+
+def _cell_stats(cells, values, size):
+    # Shape statistics of every (cell, trait), cells numbered 0..size-1
+    rows, traits = values.shape
+    flat_cells = (np.arange(traits)[:, None] * size + cells).ravel()
+    flat = values.T.ravel()
+    cell_count = size * traits
+    present = ~np.isnan(flat)
+    count = np.bincount(flat_cells[present], minlength=cell_count).astype("float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.bincount(flat_cells[present], flat[present], minlength=cell_count) / count
+        deviation = flat[present] - mean[flat_cells[present]]
+        m2 = np.bincount(flat_cells[present], deviation ** 2, minlength=cell_count) / count
+        m3 = np.bincount(flat_cells[present], deviation ** 3, minlength=cell_count) / count
+        # Adjusted Fisher-Pearson coefficient, as pandas' skew()
+        skew = m3 / m2 ** 1.5 * np.sqrt(count * (count - 1)) / (count - 2)
+    minimum, q1, median, q3, maximum = cell_quantiles(flat_cells, flat, cell_count, (0, 0.25, 0.5, 0.75, 1))
+    modes = count_modes(flat_cells, flat, cell_count, minimum, maximum, count,
+                        np.sqrt(m2 * count / (count - 1)), q3 - q1)
+    outlier, _, _ = flag_outliers(flat_cells, flat, cell_count)
+    order = np.argsort(flat_cells[outlier], kind="stable")
+    listed = np.split(flat[outlier][order], np.cumsum(np.bincount(flat_cells[outlier], minlength=cell_count))[:-1])
+    columns = dict(count=count, min=minimum, max=maximum, median=median, mean=mean, skew=skew, modes=modes)
+    # Reorder from trait-major to cell-major rows
+    index = (np.arange(size)[:, None] + np.arange(traits)[None, :] * size).ravel()
+    frame = pd.DataFrame({name: column[index] for name, column in columns.items()})
+    frame["outliers"] = [tuple(listed[i]) for i in index]
+    return frame
+
+
+@lru_cache(maxsize=8)
+def _distribution_stats(digest, state):
+    levels = model_inputs().levels
+    groups, genders, values = model_rows(state)
+    by_gender = _cell_stats(groups * len(levels["gender"]) + genders, values,
+                            len(levels["group"]) * len(levels["gender"]))
+    by_gender.index = pd.MultiIndex.from_product([levels["group"], levels["gender"], TRAITS])
+    by_population = _cell_stats(groups, values, len(levels["group"]))
+    by_population.index = pd.MultiIndex.from_product([levels["group"], [ALL_GENDERS], TRAITS])
+    return pd.concat([by_gender, by_population]).rename_axis(["population", "gender", "trait"])
+
+
+def distribution_stats(state=None):
+    """Return range, median, mean, skewness, mode count and IQR outliers of every group.
+
+    Rows are (population, gender, trait), with the gender ``ALL_GENDERS``
+    for whole populations. Computed once per dataset version and state.
+    """
+    return _distribution_stats(dataset_hash(), state)
+
+
+def _listing(values):
+    values = sorted(values, reverse=True)
+    words = [f"{value:g}" for value in values[:LISTED_OUTLIERS]]
+    if len(values) > LISTED_OUTLIERS:
+        words.append(f"{len(values) - LISTED_OUTLIERS} more")
+    return words[0] if len(words) == 1 else f"{', '.join(words[:-1])} and {words[-1]}"
+
+
+def describe(population, trait, gender=ALL_GENDERS, state=None):
+    """Write the description of one distribution from ``distribution_stats``.
+
+    Returns None when the group has no measurements of ``trait``.
+    """
+    stats = distribution_stats(state).loc[(population, gender, trait)]
+    if stats["count"] == 0:
+        return None
+    skew = stats["skew"]
+    side = "left" if skew < 0 else "right"
+    strength = "symmetric" if abs(skew) < 0.5 or np.isnan(skew) else "slight" if abs(skew) < 1 else "skewed"
+    modes = int(stats["modes"])
+    outliers = stats["outliers"]
+    subject = f"of {trait} in {population}" if gender == ALL_GENDERS else f"for {gender.lower()}s"
+    return TEMPLATE.format(
+        subject=subject,
+        shape=SHAPES[strength].format(side=side, skew=skew),
+        modality=MODALITIES.get(modes, MULTIMODAL).format(modes=modes),
+        min=stats["min"],
+        max=stats["max"],
+        median=stats["median"],
+        mean=stats["mean"],
+        outliers=OUTLIERS.get(len(outliers), SEVERAL_OUTLIERS).format(
+            count=len(outliers), values=_listing(outliers) if outliers else ""),
+    )
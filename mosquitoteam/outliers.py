@@ -0,0 +1,189 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from mosquitoteam.data import TRAITS, dataset_hash, group_index, model_inputs
+from mosquitoteam.lazy import lazy_import
+
+scipy_stats = lazy_import("scipy.stats")
+
+METHODS = ("IQR", "MAD", "Grubbs")
+# Modified z-score above which a value is a MAD outlier (Iglewicz and Hoaglin)
+MAD_THRESHOLD = 3.5
+GRUBBS_ALPHA = 0.05
+# Most values removed from one cell by the repeated Grubbs test
+MAX_GRUBBS_ROUNDS = 10
+
+
+def _cell_order(cells, values, size):
+    # Row order sorted by cell, then value, with missing values last in each
+    # cell. Sorting the values and then, stably, their cell numbers as the
+    # narrowest integers that hold them (a radix sort) is far quicker than a
+    # lexsort. Tied values are left in no particular order.
+    order = np.argsort(values)
+    order = order[np.argsort(cells[order].astype(np.min_scalar_type(size)), kind="stable")]
+    count = np.bincount(cells[~np.isnan(values)], minlength=size)
+    start = np.searchsorted(cells[order], np.arange(size))
+    return order, start, count
+
+
+def _sorted_quantile(values, start, count, q):
+    # Linear-interpolated quantile of each cell of cell-then-value sorted values
+    position = start + q * np.maximum(count - 1, 0)
+    low = np.floor(position).astype(np.intp)
+    last = len(values) - 1
+    below = values[np.minimum(low, last)]
+    above = values[np.minimum(low + 1, last)]
+    with np.errstate(invalid="ignore"):
+        result = below + (above - below) * (position - low)
+    return np.where(count > 0, np.where(position == low, below, result), np.nan)
+
+
+def cell_quantiles(cells, values, size, q):
+    """Return the quantiles ``q`` of ``values`` within every cell.
+
+    ``cells`` numbers the cells 0..size-1; one sort serves all quantiles and
+    missing values are ignored.
+    """
+    order, start, count = _cell_order(cells, values, size)
+    return [_sorted_quantile(values[order], start, count, p) for p in q]
+
+
+def _grubbs(cells, values, size, order, start, count):
+    # Repeated two-sided Grubbs test: drop the most extreme value of every
+    # cell where it is significant, until no cell has one left. The most
+    # extreme value is the smallest or largest one left, so each round only
+    # looks at the two ends of every cell in the ``_cell_order`` sort.
+    flagged = np.zeros(len(values), dtype=bool)
+    if not len(values):
+        return flagged
+    cells, values = cells[order], values[order]
+    present = ~np.isnan(values)
+    centre = np.bincount(cells[present], values[present], minlength=size) / np.maximum(count, 1)
+    # Sums of the values centred on their cell mean, updated as values go
+    deviation = values - centre[cells]
+    total = np.bincount(cells[present], deviation[present], minlength=size)
+    squares = np.bincount(cells[present], deviation[present] ** 2, minlength=size)
+    # Of tied values the one on the lowest row goes first: from the bottom
+    # that is the next position, from the top the start of the run of ties
+    # plus the number already taken from it. So the runs of ties the rounds
+    # can reach from either end of a cell are put back in row order.
+    new_run = np.r_[True, (values[1:] != values[:-1]) | (cells[1:] != cells[:-1])]
+    run = np.cumsum(new_run) - 1
+    run_start = np.flatnonzero(new_run)
+    run_end = np.r_[run_start[1:] - 1, len(values) - 1]
+    steps = np.arange(MAX_GRUBBS_ROUNDS + 1)
+    reach = steps < count[:, None]
+    reached = np.zeros(len(run_start), dtype=bool)
+    reached[run[(start[:, None] + steps)[reach]]] = True
+    reached[run[((start + count - 1)[:, None] - steps)[reach]]] = True
+    tied = np.flatnonzero(reached[run])
+    order = order.copy()
+    order[tied] = order[tied][np.lexsort((order[tied], run[tied]))]
+    low, high, n = start.copy(), start + count - 1, count.copy()
+    for _ in range(MAX_GRUBBS_ROUNDS):
+        live = n > 2
+        if not live.any():
+            break
+        low_at, high_at = np.where(live, low, 0), np.where(live, high, 0)
+        top = run_start[run[high_at]] + (run_end[run[high_at]] - high_at)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = total / n
+            spread = np.sqrt((squares - total * mean) / (n - 1))
+            low_score = np.abs(deviation[low_at] - mean) / spread
+            high_score = np.abs(deviation[high_at] - mean) / spread
+            t = scipy_stats.t.isf(GRUBBS_ALPHA / (2 * n), n - 2)
+            critical = (n - 1) / np.sqrt(n) * np.sqrt(t ** 2 / (n - 2 + t ** 2))
+        largest = np.maximum(low_score, high_score)
+        significant = live & (largest > critical)
+        if not significant.any():
+            break
+        from_low = (low_score > high_score) | ((low_score == high_score) & (order[low_at] < order[top]))
+        taken = np.where(from_low, low_at, high_at)[significant]
+        flagged[order[np.where(from_low, low_at, top)[significant]]] = True
+        total[significant] -= deviation[taken]
+        squares[significant] -= deviation[taken] ** 2
+        n[significant] -= 1
+        low += significant & from_low
+        high -= significant & ~from_low
+    return flagged
+
+
+def flag_outliers(cells, values, size):
+    """Flag IQR, MAD and Grubbs outliers of ``values`` within every cell.
+
+    ``cells`` numbers the cells 0..size-1. Returns one boolean mask per
+    method of ``METHODS``; missing values are never flagged.
+    """
+    order, start, count = _cell_order(cells, values, size)
+    q1, median, q3 = (_sorted_quantile(values[order], start, count, q) for q in (0.25, 0.5, 0.75))
+    spread = 1.5 * (q3 - q1)
+    with np.errstate(invalid="ignore"):
+        iqr = (values < (q1 - spread)[cells]) | (values > (q3 + spread)[cells])
+    deviation = np.abs(values - median[cells])
+    mad, = cell_quantiles(cells, deviation, size, (0.5,))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mad = (0.6745 * deviation / mad[cells]) > MAD_THRESHOLD
+    return iqr, mad, _grubbs(cells, values, size, order, start, count)
+
+
+@lru_cache(maxsize=4)
+def _outlier_flags(digest, state):
+    inputs = model_inputs()
+    rows = np.arange(len(inputs.values)) if state is None else group_index().rows(state=state)
+    traits = len(TRAITS)
+    genders = len(inputs.levels["gender"])
+    cells = (inputs.codes["group"] * genders + inputs.codes["gender"])[rows]
+    # Every (population, gender, trait) cell at once: the value matrix is
+    # flattened trait by trait and the trait number folded into the cell.
+    size = len(inputs.levels["group"]) * genders
+    flat_cells = (np.arange(traits)[:, None] * size + cells).ravel()
+    masks = flag_outliers(flat_cells, inputs.values[rows].T.ravel(), size * traits)
+    flags = {}
+    for method, mask in zip(METHODS, masks):
+        flags[method] = np.zeros(inputs.values.shape, dtype=bool)
+        flags[method][rows] = mask.reshape(traits, len(rows)).T
+        flags[method].flags.writeable = False
+    return flags
+
+
+def outlier_flags(state=None):
+    """Return ``{method: (rows, TRAITS) mask}`` of the ``load_groups`` rows.
+
+    Outliers are judged within each population and gender, among the
+    individuals of one mating state if ``state`` is given (rows of other
+    states are never flagged then). The masks are computed once per dataset
+    version and state.
+    """
+    return _outlier_flags(dataset_hash(), state)
+
+
+@lru_cache(maxsize=64)
+def _outlier_rows(digest, method, trait, state):
+    return np.flatnonzero(outlier_flags(state)[method][:, TRAITS.index(trait)])
+
+
+def outlier_rows(method, trait, state=None):
+    """Return the ``load_groups`` row positions flagged by ``method`` for ``trait``."""
+    return _outlier_rows(dataset_hash(), method, trait, state)
+
+
+def outlier_table(trait, population=None, state=None):
+    """List the flagged values of ``trait``, one row per value and method."""
+    inputs = model_inputs()
+    groups = np.asarray(inputs.levels["group"], dtype=object)
+    genders = np.asarray(inputs.levels["gender"], dtype=object)
+    parts = []
+    for method in METHODS:
+        rows = outlier_rows(method, trait, state)
+        parts.append(pd.DataFrame({
+            "population": groups[inputs.codes["group"][rows]],
+            "gender": genders[inputs.codes["gender"][rows]],
+            "method": method,
+            "value": inputs.values[rows, TRAITS.index(trait)],
+        }))
+    table = pd.concat(parts, ignore_index=True)
+    if population is not None:
+        table = table[table["population"] == population].drop(columns="population")
+    return table.reset_index(drop=True)
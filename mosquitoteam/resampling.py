@@ -0,0 +1,238 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from mosquitoteam.data import TRAITS, dataset_hash, model_inputs
+from mosquitoteam.stats import model_rows
+
+# Most resamples drawn per task; each task is one batch of NumPy calls
+BATCH_SIZE = 1000
+# Memory of one (batch, rows) float64 array of a task. Batches of large
+# populations are made smaller so every worker stays within a few of these.
+BATCH_BYTES = 32 * 2 ** 20
+
+_lock = threading.Lock()
+_pool = None
+
+
+def resampling_pool(workers=None):
+    """Return the process pool shared by every resampling run."""
+    global _pool
+    with _lock:
+        if _pool is None:
+            # spawn, not fork: the Streamlit server process runs many threads
+            _pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def f_statistics(values, present, codes, k):
+    """One-way ANOVA F of every column for one or many labellings at once.
+
+    ``values`` (rows, columns) is centred with missing entries set to 0 and
+    ``present`` marks the measured ones. ``codes`` holds group labels 0..k-1
+    with shape (rows,) or (labellings, rows).
+    """
+    total = values.sum(axis=0)
+    count = present.sum(axis=0)
+    explained = 0.0
+    for group in range(k):
+        members = (codes == group).astype("float64")
+        sums, sizes = members @ values, members @ present
+        with np.errstate(divide="ignore", invalid="ignore"):
+            explained = explained + np.where(sizes > 0, sums ** 2 / sizes, 0.0)
+    sum_sq_between = explained - total ** 2 / count
+    sum_sq_within = (values ** 2).sum(axis=0) - explained
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (sum_sq_between / (k - 1)) / (sum_sq_within / (count - k))
+
+
+def _centred(values):
+    present = ~np.isnan(values)
+    return np.where(present, values - np.nanmean(values, axis=0), 0.0), present.astype("float64")
+
+
+def _permutation_task(values, codes, k, size, seed):
+    # Number of permutations whose F reaches the observed F, per column
+    values, present = _centred(values)
+    observed = f_statistics(values, present, codes, k)
+    permuted = np.random.default_rng(seed).permuted(np.tile(codes, (size, 1)), axis=1)
+    return (f_statistics(values, present, permuted, k) >= observed).sum(axis=0)
+
+
+def _bootstrap_task(first, second, size, seed):
+    # Mean differences (second - first) of ``size`` bootstrap resamples
+    rng = np.random.default_rng(seed)
+    means = []
+    for sample in (first, second):
+        # How often each row is drawn in each resample; the means are then
+        # one matrix product instead of a gather of every drawn row
+        draws = rng.multinomial(len(sample), np.full(len(sample), 1 / len(sample)), size=size)
+        present = ~np.isnan(sample)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            means.append((draws @ np.where(present, sample, 0.0)) / (draws @ present))
+    return means[1] - means[0]
+
+
+def batch_sizes(resamples, rows):
+    """Split ``resamples`` into batches whose (batch, rows) arrays fit ``BATCH_BYTES``."""
+    if resamples < 1:
+        raise ValueError("resamples must be at least 1")
+    size = max(1, min(BATCH_SIZE, BATCH_BYTES // (8 * max(rows, 1))))
+    return [size] * (resamples // size) + [resamples % size] * bool(resamples % size)
+
+
+def _run(task, jobs, resamples, seed, workers):
+    # ``jobs`` are (rows, task arguments). Every job is split into batches,
+    # each with its own child seed, so the results do not depend on how many
+    # workers run them. Returns the batch results of every job.
+    batches = [(job, size) for job, (rows, _) in enumerate(jobs) for size in batch_sizes(resamples, rows)]
+    seeds = np.random.SeedSequence(seed).spawn(len(batches))
+    columns = [list(column) for column in zip(*((*jobs[job][1], size) for job, size in batches))] + [seeds]
+    if workers == 1:
+        results = list(map(task, *columns))
+    else:
+        results = list(resampling_pool(workers).map(task, *columns))
+    grouped = [[] for _ in jobs]
+    for (job, _), result in zip(batches, results):
+        grouped[job].append(result)
+    return grouped
+
+
+def _cells(state):
+    # (population, trait values, gender codes) of every population
+    groups, genders, values = model_rows(state)
+    return [(population, values[groups == code], genders[groups == code])
+            for code, population in enumerate(model_inputs().levels["group"])]
+
+
+@lru_cache(maxsize=8)
+def _permutation_anovas(digest, state, resamples, seed, workers):
+    inputs = model_inputs()
+    k = len(inputs.levels["gender"])
+    cells = _cells(state)
+    counts = _run(_permutation_task, [(len(values), (values, genders, k)) for _, values, genders in cells],
+                  resamples, seed, workers)
+    rows = []
+    for (population, values, genders), batches in zip(cells, counts):
+        observed = f_statistics(*_centred(values), genders, k)
+        exceed = np.sum(batches, axis=0)
+        rows.append(pd.DataFrame({
+            "population": population,
+            "trait": TRAITS,
+            "F": observed,
+            "p-value": (exceed + 1) / (resamples + 1),
+        }))
+    return pd.concat(rows, ignore_index=True).assign(resamples=resamples)
+
+
+def permutation_anovas(resamples=10000, seed=0, state=None, workers=None):
+    """Permutation test of the gender ANOVA for every population and trait.
+
+    Gender labels are shuffled within each population ``resamples`` times
+    and the p-value is the share of shuffles whose F statistic reaches the
+    observed one. Results are reproducible for a given ``seed`` whatever the
+    number of ``workers``, and cached by data content.
+    """
+    return _permutation_anovas(dataset_hash(), state, resamples, seed, workers)
+
+
+def _intervals(pairs, resamples, seed, alpha, workers):
+    # Mean difference (second - first) and its percentile bounds of every
+    # (first, second) pair of value matrices
+    jobs = [(max(len(first), len(second)), (first, second)) for first, second in pairs]
+    differences = _run(_bootstrap_task, jobs, resamples, seed, workers)
+    results = []
+    for (first, second), batches in zip(pairs, differences):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            lower, upper = np.nanquantile(np.concatenate(batches), [alpha / 2, 1 - alpha / 2], axis=0)
+            meandiff = np.nanmean(second, axis=0) - np.nanmean(first, axis=0)
+        results.append((meandiff, lower, upper))
+    return results
+
+
+@lru_cache(maxsize=8)
+def _bootstrap_differences(digest, state, resamples, seed, alpha, workers):
+    levels = model_inputs().levels["gender"]
+    cells = _cells(state)
+    pairs = [(values[genders == 0], values[genders == 1]) for _, values, genders in cells]
+    rows = []
+    for (population, _, _), (meandiff, lower, upper) in zip(cells, _intervals(pairs, resamples, seed, alpha,
+                                                                              workers)):
+        rows.append(pd.DataFrame({
+            "population": population,
+            "trait": TRAITS,
+            "group1": levels[0],
+            "group2": levels[1],
+            "meandiff": meandiff,
+            "lower": lower,
+            "upper": upper,
+        }))
+    return pd.concat(rows, ignore_index=True).assign(resamples=resamples)
+
+
+def bootstrap_differences(resamples=10000, seed=0, alpha=0.05, state=None, workers=None):
+    """Bootstrap confidence intervals of the gender mean difference.
+
+    ``meandiff`` is the mean of ``group2`` minus that of ``group1``, with
+    percentile bounds at ``alpha`` from ``resamples`` resamples drawn within
+    each gender. Reproducible and cached like ``permutation_anovas``.
+    """
+    if len(model_inputs().levels["gender"]) != 2:
+        raise ValueError("bootstrap differences need exactly two genders")
+    return _bootstrap_differences(dataset_hash(), state, resamples, seed, alpha, workers)
+
+
+@lru_cache(maxsize=8)
+def _group_permutation_anovas(digest, state, resamples, seed, workers):
+    k = len(model_inputs().levels["group"])
+    groups, _, values = model_rows(state)
+    counts, = _run(_permutation_task, [(len(values), (values, groups, k))], resamples, seed, workers)
+    return pd.DataFrame({
+        "trait": TRAITS,
+        "F": f_statistics(*_centred(values), groups, k),
+        "p-value": (np.sum(counts, axis=0) + 1) / (resamples + 1),
+    }).assign(resamples=resamples)
+
+
+def group_permutation_anovas(resamples=10000, seed=0, state=None, workers=None):
+    """Permutation test of the One Way ANOVA across the populations for every trait.
+
+    Population labels are shuffled across all individuals; otherwise as
+    ``permutation_anovas``.
+    """
+    return _group_permutation_anovas(dataset_hash(), state, resamples, seed, workers)
+
+
+@lru_cache(maxsize=8)
+def _group_bootstrap_differences(digest, state, resamples, seed, alpha, workers):
+    cells = _cells(state)
+    first, second = np.triu_indices(len(cells), 1)
+    pairs = [(cells[i][1], cells[j][1]) for i, j in zip(first, second)]
+    rows = []
+    for i, j, (meandiff, lower, upper) in zip(first, second, _intervals(pairs, resamples, seed, alpha, workers)):
+        rows.append(pd.DataFrame({
+            "trait": TRAITS,
+            "group1": cells[i][0],
+            "group2": cells[j][0],
+            "meandiff": meandiff,
+            "lower": lower,
+            "upper": upper,
+        }))
+    return pd.concat(rows, ignore_index=True).sort_values(
+        "trait", kind="stable", key=lambda trait: trait.map(TRAITS.index), ignore_index=True).assign(
+        resamples=resamples)
+
+
+def group_bootstrap_differences(resamples=10000, seed=0, alpha=0.05, state=None, workers=None):
+    """Bootstrap confidence intervals of the mean difference of every pair of populations.
+
+    Rows follow ``stats.tukey_hsd`` for every trait; resamples are drawn
+    within each population, as in ``bootstrap_differences``.
+    """
+    return _group_bootstrap_differences(dataset_hash(), state, resamples, seed, alpha, workers)
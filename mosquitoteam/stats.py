@@ -0,0 +1,309 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from mosquitoteam.data import TRAITS, dataset_hash, group_index, model_inputs, select_groups
+from mosquitoteam.lazy import lazy_import
+
+scipy_stats = lazy_import("scipy.stats")
+
+MAX_BINS = 15
+# gender label of the summary rows covering a whole population
+ALL_GENDERS = "All"
+DESCRIBE_STATS = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+BOX_STATS = ["q1", "median", "q3", "lowerfence", "upperfence"]
+ANOVA_COLUMNS = ["population", "trait", "sum_sq_between", "sum_sq_within",
+                 "df_between", "df_within", "F", "p-value"]
+
+
+def cell_sums(by_codes, by_size, factor_codes, factor_size, values):
+    """Return count, sum and sum of squares of every column of ``values`` per cell.
+
+    The arrays have shape (by_size, factor_size, number of columns) and are
+    computed in one sorted pass over the rows. Missing values are left out
+    of their own column only.
+    """
+    present = ~np.isnan(values)
+    # Centering on the column mean keeps the sum of squares well conditioned.
+    values = np.where(present, values - np.nanmean(values, axis=0), 0.0)
+
+    cells = by_codes * factor_size + factor_codes
+    order = np.argsort(cells, kind="stable")
+    cells = cells[order]
+    starts = np.flatnonzero(np.r_[True, cells[1:] != cells[:-1]])
+    shape = (by_size * factor_size, values.shape[1])
+    count, total, squares = np.zeros(shape), np.zeros(shape), np.zeros(shape)
+    stacked = np.add.reduceat(
+        np.concatenate([present[order], values[order], values[order] ** 2], axis=1), starts, axis=0)
+    count[cells[starts]], total[cells[starts]], squares[cells[starts]] = np.split(stacked, 3, axis=1)
+
+    shape = (by_size, factor_size, values.shape[1])
+    return count.reshape(shape), total.reshape(shape), squares.reshape(shape)
+
+
+def anova_from_sums(levels, traits, count, total, squares):
+    """One-way ANOVA of every trait within each level from ``cell_sums``."""
+    n = count.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cell_ss = np.where(count > 0, total ** 2 / count, 0.0)
+        sum_sq_between = cell_ss.sum(axis=1) - total.sum(axis=1) ** 2 / n
+        sum_sq_within = (squares - cell_ss).sum(axis=1)
+        df_between = (count > 0).sum(axis=1) - 1
+        df_within = n - df_between - 1
+        statistic = (sum_sq_between / df_between) / (sum_sq_within / df_within)
+    results = pd.DataFrame({
+        "population": np.repeat(list(levels), len(traits)),
+        "trait": np.tile(list(traits), len(levels)),
+        "sum_sq_between": sum_sq_between.ravel(),
+        "sum_sq_within": sum_sq_within.ravel(),
+        "df_between": df_between.ravel(),
+        "df_within": df_within.ravel().astype("int64"),
+        "F": statistic.ravel(),
+    }, columns=ANOVA_COLUMNS[:-1])
+    results["p-value"] = scipy_stats.f.sf(results["F"], results["df_between"], results["df_within"])
+    return results
+
+
+def model_rows(state=None):
+    """Return the group codes, gender codes and trait values of ``model_inputs``.
+
+    With ``state`` only the individuals of that mating state are returned.
+    """
+    inputs = model_inputs()
+    groups, genders, values = inputs.codes["group"], inputs.codes["gender"], inputs.values
+    if state is not None:
+        rows = group_index().rows(state=state)
+        groups, genders, values = groups[rows], genders[rows], values[rows]
+    return groups, genders, values
+
+
+def _saved_state():
+    # Imported here: ingest builds on this module
+    from mosquitoteam.ingest import saved_state
+    return saved_state()
+
+
+@lru_cache(maxsize=8)
+def _gender_anovas(digest, state):
+    saved = _saved_state() if state is None else None
+    if saved is not None:
+        return saved.gender_anovas()
+    levels = model_inputs().levels
+    groups, genders, values = model_rows(state)
+    sums = cell_sums(groups, len(levels["group"]), genders, len(levels["gender"]), values)
+    return anova_from_sums(levels["group"], TRAITS, *sums)
+
+
+def gender_anovas(state=None):
+    """Return the gender ANOVA of every population and trait.
+
+    Pass ``state`` to compare only individuals of one mating state. Results
+    are memoized by the content hash of the population files, so they are
+    recomputed only when the data actually changes. Right after an ingest
+    they come from its running sums, without parsing any file.
+    """
+    return _gender_anovas(dataset_hash(), state)
+
+
+def grouped_describe(frame, by, traits):
+    """``describe()`` of every trait within every group, in one grouped pass.
+
+    Returns one row per (group..., trait) with the ``DESCRIBE_STATS`` columns.
+    """
+    grouped = frame.groupby(list(by), observed=True)[list(traits)]
+    summary = pd.concat([grouped.count(), grouped.mean(), grouped.std(), grouped.min(),
+                         grouped.quantile(0.25), grouped.quantile(0.5), grouped.quantile(0.75),
+                         grouped.max()], axis=1, keys=DESCRIBE_STATS)
+    return summary.stack(level=1, future_stack=True).rename_axis([*by, "trait"])
+
+
+@lru_cache(maxsize=8)
+def _summaries(digest, state):
+    frame = select_groups(("group", "gender", *TRAITS), state=state)
+    by_gender = grouped_describe(frame, ("group", "gender"), TRAITS)
+    by_population = grouped_describe(frame, ("group",), TRAITS)
+    by_population = pd.concat({ALL_GENDERS: by_population}, names=["gender"]).swaplevel(0, 1)
+    summaries = pd.concat([by_gender, by_population]).sort_index(level=["group", "trait"], sort_remaining=False)
+    return summaries.rename_axis(["population", "gender", "trait"])
+
+
+def summaries(state=None):
+    """Return the ``describe()`` statistics of every population, gender and trait.
+
+    Rows for a whole population have the gender ``ALL_GENDERS``. Pass
+    ``state`` to describe one mating state only. Each table is computed once
+    per dataset version.
+    """
+    return _summaries(dataset_hash(), state)
+
+
+def trait_summary(trait, population, gender=ALL_GENDERS, state=None):
+    """Look up the ``describe()`` statistics of one population (and gender).
+
+    A population or gender without individuals in ``state`` has a count of 0
+    and missing statistics, as ``describe()`` gives for an empty column.
+    """
+    table, key = summaries(state), (population, gender, trait)
+    if key not in table.index:
+        return pd.Series([0.0] + [np.nan] * (len(DESCRIBE_STATS) - 1), index=DESCRIBE_STATS, name=key)
+    return table.loc[key]
+
+
+def moments_from_codes(codes, levels, values, name=None):
+    """Return the count, mean and M2 of ``values`` per level of ``codes``."""
+    present = ~np.isnan(values)
+    codes, values = codes[present], values[present]
+    count = np.bincount(codes, minlength=len(levels)).astype("float64")
+    mean = np.bincount(codes, values, minlength=len(levels)) / count
+    m2 = np.bincount(codes, (values - mean[codes]) ** 2, minlength=len(levels))
+    return pd.DataFrame({"count": count, "mean": mean, "M2": m2}, index=pd.Index(levels, name=name))
+
+
+@lru_cache(maxsize=32)
+def _population_moments(digest, trait):
+    saved = _saved_state()
+    if saved is not None:
+        return saved.moments(trait)
+    inputs = model_inputs()
+    values = inputs.values[:, TRAITS.index(trait)]
+    return moments_from_codes(inputs.codes["group"], inputs.levels["group"], values, "group")
+
+
+def population_moments(trait):
+    """Return the per-population moments of ``trait``, memoized by data content.
+
+    Like ``gender_anovas`` they come from the ingest running sums when those
+    match the data.
+    """
+    return _population_moments(dataset_hash(), trait)
+
+
+def one_way_anova(moments, alpha=0.05):
+    """One-way ANOVA computed from ``population_moments`` alone.
+
+    Returns the sums of squares, degrees of freedom, F statistic, p-value and
+    the critical F value at ``alpha``.
+    """
+    count, mean = moments["count"], moments["mean"]
+    n = count.sum()
+    grand_mean = (count * mean).sum() / n
+    df_between = len(moments) - 1
+    df_within = int(n) - len(moments)
+    sum_sq_between = (count * (mean - grand_mean) ** 2).sum()
+    sum_sq_within = moments["M2"].sum()
+    statistic = (sum_sq_between / df_between) / (sum_sq_within / df_within)
+    return pd.Series({
+        "sum_sq_between": sum_sq_between,
+        "sum_sq_within": sum_sq_within,
+        "df_between": df_between,
+        "df_within": df_within,
+        "F": statistic,
+        "p-value": scipy_stats.f.sf(statistic, df_between, df_within),
+        "critical": scipy_stats.f.ppf(1 - alpha, df_between, df_within),
+    })
+
+
+def tukey_hsd(moments, alpha=0.05):
+    """Tukey-Kramer pairwise comparisons computed from ``population_moments`` alone.
+
+    Rows follow statsmodels' ``pairwise_tukeyhsd`` layout: ``meandiff`` is the
+    mean of ``group2`` minus the mean of ``group1``.
+    """
+    k = len(moments)
+    count = moments["count"].to_numpy()
+    mean = moments["mean"].to_numpy()
+    df_within = count.sum() - k
+    mean_sq_within = moments["M2"].sum() / df_within
+    first, second = np.triu_indices(k, 1)
+    meandiff = mean[second] - mean[first]
+    std_err = np.sqrt(mean_sq_within / 2 * (1 / count[first] + 1 / count[second]))
+    margin = scipy_stats.studentized_range.ppf(1 - alpha, k, df_within) * std_err
+    p_adj = scipy_stats.studentized_range.sf(np.abs(meandiff) / std_err, k, df_within)
+    return pd.DataFrame({
+        "group1": moments.index[first],
+        "group2": moments.index[second],
+        "meandiff": meandiff,
+        "p-adj": p_adj,
+        "lower": meandiff - margin,
+        "upper": meandiff + margin,
+        "reject": p_adj < alpha,
+    })
+
+
+def _plotly_quartiles(values):
+    # Plotly's default "linear" quartiles: position p * n - 0.5 of the sorted
+    # values, which is numpy's "hazen" method
+    values = values.dropna()
+    if not len(values):
+        return pd.Series(np.nan, index=["q1", "median", "q3"])
+    return pd.Series(np.quantile(values, [0.25, 0.5, 0.75], method="hazen"), index=["q1", "median", "q3"])
+
+
+def box_stats(frame, by, trait):
+    """Return the box-plot statistics of ``trait`` per group and its outlier mask.
+
+    Quartiles and fences are those Plotly computes itself with its default
+    "linear" quartile method; the fences are the most extreme values within
+    1.5 IQR of the box. The mask flags every row outside the fences. An empty
+    ``frame`` gives an empty summary.
+    """
+    values, groups = frame[trait].astype("float64"), frame[by]
+    if not len(frame):
+        return pd.DataFrame(columns=BOX_STATS, dtype="float64"), pd.Series(False, index=frame.index)
+    quartiles = values.groupby(groups, observed=True, sort=False).apply(_plotly_quartiles).unstack()
+    spread = 1.5 * (quartiles["q3"] - quartiles["q1"])
+    low = groups.map(quartiles["q1"] - spread).astype("float64")
+    high = groups.map(quartiles["q3"] + spread).astype("float64")
+    inside = values.between(low, high)
+    grouped = values.where(inside).groupby(groups, observed=True, sort=False)
+    quartiles["lowerfence"] = np.fmin(grouped.min(), quartiles["q1"])
+    quartiles["upperfence"] = np.fmax(grouped.max(), quartiles["q3"])
+    return quartiles, values.notna() & ~inside
+
+
+def point_sample(groups, size, seed=0):
+    """Mask of a stratified random sample of at most ``size`` rows per group.
+
+    A fixed seed keeps the same points on every rerun.
+    """
+    key = pd.Series(np.random.default_rng(seed).random(len(groups)), index=groups.index)
+    return key.groupby(groups, observed=True).rank(method="first") <= size
+
+
+def bin_counts(values, max_bins=MAX_BINS):
+    """Histogram ``values`` into every bin count from 1 to ``max_bins``.
+
+    Returns ``{bins: (edges, counts)}`` with equal-width bins as in
+    ``numpy.histogram``. The values are sorted once, after which each
+    histogram costs one binary search per bin edge.
+    """
+    values = np.sort(np.asarray(values, dtype="float64"))
+    histograms = {}
+    for bins in range(1, max_bins + 1):
+        edges = np.histogram_bin_edges(values, bins=bins)
+        # Bins are half-open except the last, which includes the maximum
+        positions = np.r_[0, np.searchsorted(values, edges[1:-1]), len(values)]
+        histograms[bins] = edges, np.diff(positions)
+    return histograms
+
+
+@lru_cache(maxsize=256)
+def _trait_histograms(digest, trait, group, gender, state):
+    values = select_groups((trait,), group, gender, state)[trait]
+    return bin_counts(values.dropna().to_numpy())
+
+
+def trait_histograms(trait, group, gender=None, state=None):
+    """Return ``bin_counts`` of ``trait`` for a population, or one gender or state of it."""
+    return _trait_histograms(dataset_hash(), trait, group, gender, state)
+
+
+def anova_table(result, factor="gender"):
+    """Lay one ``gender_anovas`` or ``one_way_anova`` row out like statsmodels' ``anova_lm`` table."""
+    return pd.DataFrame({
+        "sum_sq": [result["sum_sq_between"], result["sum_sq_within"]],
+        "df": [float(result["df_between"]), float(result["df_within"])],
+        "F": [result["F"], np.nan],
+        "PR(>F)": [result["p-value"], np.nan],
+    }, index=[factor, "Residual"])
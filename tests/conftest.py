@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from mosquitoteam import data
+from mosquitoteam.data import GROUP_KEYS, TRAITS, model_inputs
+
+
+@pytest.fixture(scope="session")
+def frame():
+    """The shipped data as one plain DataFrame of labels and float64 traits.
+
+    It holds exactly the values the analyses see, so the reference results
+    computed from it with scipy and statsmodels must agree to rounding.
+    """
+    inputs = model_inputs()
+    labels = {key: np.asarray(inputs.levels[key], dtype=object)[inputs.codes[key]] for key in GROUP_KEYS}
+    return pd.DataFrame({**labels, **dict(zip(TRAITS, np.array(inputs.values).T))})
+
+
+def samples(frame, by, trait):
+    """Return the measured values of ``trait`` for every level of ``by``, in sorted order."""
+    return [group[trait].dropna().to_numpy() for _, group in frame.groupby(by, sort=True)]
+
+
+@pytest.fixture
+def data_copy(tmp_path, monkeypatch):
+    """Point the package at a writable copy of the shipped population files."""
+    for name in data.populations():
+        with open(data.population_path(name), "rb") as source:
+            (tmp_path / f"{name}.csv").write_bytes(source.read())
+    monkeypatch.setattr(data, "DATA_DIR", str(tmp_path))
+    return tmp_path
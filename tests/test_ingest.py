@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from mosquitoteam import data, ingest, stats
+from mosquitoteam.data import TRAITS
+
+
+def _rows(name, count):
+    # New individuals shaped like the population file: its first rows again
+    return data.load_population(name).head(count)
+
+
+def test_batched_updates_match_a_full_recompute(frame):
+    state = ingest.IngestState()
+    for population, cell in frame.groupby("group"):
+        # Uneven batches, so every merge path of the update is taken
+        for batch in np.array_split(np.arange(len(cell)), [1, 7, 50]):
+            rows = cell.iloc[batch]
+            state.update(population, rows["gender"].to_numpy(), rows[list(TRAITS)].to_numpy())
+    for trait in TRAITS:
+        grouped = frame.groupby("group")[trait]
+        expected = np.column_stack([grouped.count(), grouped.mean(), grouped.var(ddof=0) * grouped.count()])
+        np.testing.assert_allclose(state.moments(trait).to_numpy(), expected, rtol=1e-9)
+        for population, cell in frame.groupby("group"):
+            by_gender = cell.groupby("gender")[trait]
+            expected = np.column_stack([by_gender.count(), by_gender.mean(), by_gender.var(ddof=0) * by_gender.count()])
+            np.testing.assert_allclose(state.moments(trait, population).sort_index().to_numpy(), expected, rtol=1e-9)
+
+    result, expected = state.gender_anovas(), stats.gender_anovas()
+    pd.testing.assert_frame_equal(result[["population", "trait"]], expected[["population", "trait"]])
+    np.testing.assert_allclose(result["F"], expected["F"], rtol=1e-9)
+
+
+def test_ingest_updates_the_saved_statistics(data_copy):
+    name = data.populations()[0]
+    ingest.ingest(name, _rows(name, 5))
+    saved, rebuilt = ingest.saved_state(), ingest.rebuild_state()
+    assert saved is not None and saved.digest == data.dataset_hash()
+    for trait in TRAITS:
+        np.testing.assert_allclose(saved.moments(trait).to_numpy(), rebuilt.moments(trait).to_numpy(), rtol=1e-9)
+    # The analyses answer from the saved sums, which match the files
+    np.testing.assert_allclose(stats.gender_anovas()["F"], rebuilt.gender_anovas()["F"], rtol=1e-9)
+    np.testing.assert_allclose(stats.population_moments(TRAITS[0]).to_numpy(),
+                               rebuilt.moments(TRAITS[0]).to_numpy(), rtol=1e-9)
+
+
+def test_state_of_other_files_is_not_served(data_copy):
+    ingest.load_state()
+    assert ingest.saved_state() is not None
+    name = data.populations()[0]
+    with open(data.population_path(name), "a", encoding="utf-8") as file:
+        file.write(",".join(str(value) for value in _rows(name, 1).iloc[0]) + "\n")
+    assert ingest.saved_state() is None
+
+
+@pytest.mark.parametrize("ending", ["\n", "\r\n"])
+@pytest.mark.parametrize("terminated", [True, False])
+def test_ingest_appends_in_the_file_layout(data_copy, ending, terminated):
+    name = data.populations()[0]
+    path = data.population_path(name)
+    with open(path, encoding="utf-8-sig") as file:
+        lines = file.read().splitlines()
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        file.write(ending.join(lines) + (ending if terminated else ""))
+    rows = _rows(name, 3)
+    ingest.ingest(name, rows)
+
+    with open(path, "rb") as file:
+        content = file.read()
+    assert content.endswith(ending.encode())
+    assert content.count(b"\n") == len(lines) + len(rows)
+    assert content.count(b"\r\n") == (content.count(b"\n") if ending == "\r\n" else 0)
+    appended = pd.read_csv(path, encoding="utf-8-sig").tail(len(rows))
+    np.testing.assert_allclose(appended[list(TRAITS)].to_numpy(dtype="float64"),
+                               rows[list(TRAITS)].to_numpy(dtype="float64"))
+
+
+def test_checked_rows_rejects_bad_rows(data_copy):
+    name = data.populations()[0]
+    good = _rows(name, 2).astype(object)
+    bad_values = ((name, "unknown"), (data.STATE_COLUMN, "unknown"), ("WB_Arm1", 1.5), ("WB_Arm1", None),
+                  ("WB_Arm2", 2 ** 20), (TRAITS[2], "abc"))
+    for column, value in bad_values:
+        rows = good.copy()
+        rows.loc[rows.index[0], column] = value
+        with pytest.raises(ValueError):
+            ingest.checked_rows(name, rows)
+    with pytest.raises(ValueError):
+        ingest.checked_rows(name, good.drop(columns=[TRAITS[0]]))
+    checked = ingest.checked_rows(name, good)
+    assert {column: str(dtype) for column, dtype in checked[list(TRAITS)].dtypes.items()} == data.TRAIT_DTYPES
+
+
+def test_rejected_rows_leave_the_file_alone(data_copy):
+    name = data.populations()[0]
+    with open(data.population_path(name), "rb") as file:
+        before = file.read()
+    rows = _rows(name, 2).astype(object)
+    rows.loc[rows.index[1], "WB_Arm1"] = 1.5
+    with pytest.raises(ValueError):
+        ingest.ingest(name, rows)
+    with open(data.population_path(name), "rb") as file:
+        assert file.read() == before
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from scipy import stats as scipy_stats
+
+from mosquitoteam import mixtures
+from mosquitoteam.data import TRAITS
+
+
+def test_dip_statistic_matches_diptest(frame):
+    diptest = pytest.importorskip("diptest")
+    for _, cell in frame.groupby(["group", "gender"]):
+        for trait in TRAITS:
+            values = cell[trait].dropna().to_numpy()
+            np.testing.assert_allclose(mixtures.dip_statistic(values), diptest.dipstat(values), rtol=1e-9,
+                                       err_msg=trait)
+
+
+def test_dip_of_two_point_masses():
+    assert mixtures.dip_statistic(np.r_[np.zeros(50), np.ones(50)]) == pytest.approx(0.25)
+
+
+def test_dip_test_separates_unimodal_and_bimodal():
+    rng = np.random.default_rng(0)
+    _, unimodal = mixtures.dip_test(rng.normal(size=200))
+    _, bimodal = mixtures.dip_test(np.r_[rng.normal(-4, 1, 100), rng.normal(4, 1, 100)])
+    assert unimodal > 0.05 > bimodal
+
+
+def test_mixture_likelihood_matches_scipy():
+    rng = np.random.default_rng(1)
+    values = np.r_[rng.normal(0, 1, 150), rng.normal(8, 2, 150)]
+    cells = np.zeros(len(values), dtype=np.intp)
+    likelihood, weights, means, sds = mixtures.fit_mixtures(cells, values, 1, 2)
+    density = (weights[0] * scipy_stats.norm.pdf(values[:, None], means[0], sds[0])).sum(axis=1)
+    np.testing.assert_allclose(likelihood[0], np.log(density).sum(), rtol=1e-9)
+    np.testing.assert_allclose(np.sort(means[0]), [0, 8], atol=0.5)
+
+    single, *_ = mixtures.fit_mixtures(cells, values, 1, 1)
+    np.testing.assert_allclose(single[0], scipy_stats.norm.logpdf(values, values.mean(), values.std()).sum(),
+                               rtol=1e-9)
+
+
+def test_screen_picks_the_number_of_components():
+    rng = np.random.default_rng(2)
+    values = np.r_[rng.normal(size=300), rng.normal(0, 1, 150), rng.normal(10, 1, 150)]
+    cells = np.repeat(np.arange(2), 300)
+    screen = mixtures.screen_mixtures(cells, values, 2, simulations=200)
+    assert screen["components"].tolist() == [1, 2]
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from mosquitoteam import data, narratives
+from mosquitoteam.data import STATE_COLUMN, TRAITS
+
+POPULATION = "Fixed"
+
+
+@pytest.fixture
+def fixed(data_copy):
+    """Add a population of fixed samples with known shapes to the data."""
+    rng = np.random.default_rng(0)
+    # The wingbeats are stored as integers
+    samples = {
+        ("Female", TRAITS[0]): rng.normal(400, 10, 200).round(),
+        ("Male", TRAITS[0]): np.r_[rng.normal(300, 10, 100), rng.normal(500, 10, 100)].round(),
+        ("Female", TRAITS[1]): (300 + rng.exponential(20, 200)).round(),
+        ("Male", TRAITS[1]): (600 - rng.exponential(20, 200)).round(),
+        ("Female", TRAITS[2]): np.r_[np.arange(1, 21), 100],
+        ("Male", TRAITS[2]): np.r_[np.arange(1, 41), np.arange(100, 108)],
+        ("Female", TRAITS[3]): np.arange(1, 21),
+    }
+    parts = []
+    for gender in ("Female", "Male"):
+        columns = {trait: values for (sex, trait), values in samples.items() if sex == gender}
+        rows = max(len(values) for values in columns.values())
+        part = pd.DataFrame({trait: pd.Series(values) for trait, values in columns.items()}, index=range(rows))
+        parts.append(part.assign(**{POPULATION: gender, STATE_COLUMN: "Virgin"}))
+    frame = pd.concat(parts, ignore_index=True).reindex(columns=[POPULATION, STATE_COLUMN, *TRAITS])
+    frame.to_csv(data_copy / f"{POPULATION}.csv", index=False)
+    assert POPULATION in data.populations()
+
+
+def test_modality(fixed):
+    assert " is approximately symmetric (skewness " in narratives.describe(POPULATION, TRAITS[0], "Female")
+    assert " and unimodal. " in narratives.describe(POPULATION, TRAITS[0], "Female")
+    assert " and bimodal. " in narratives.describe(POPULATION, TRAITS[0], "Male")
+
+
+def test_skew_direction(fixed):
+    assert " is skewed to the right (skewness " in narratives.describe(POPULATION, TRAITS[1], "Female")
+    assert " is skewed to the left (skewness " in narratives.describe(POPULATION, TRAITS[1], "Male")
+
+
+def test_outlier_listing(fixed):
+    assert narratives.describe(POPULATION, TRAITS[3], "Female").endswith(
+        "There are no potential outliers beyond 1.5 IQR of the quartiles.")
+    assert narratives.describe(POPULATION, TRAITS[2], "Female").endswith(
+        "There is one potential outlier: 100.")
+    assert narratives.describe(POPULATION, TRAITS[2], "Male").endswith(
+        "There are 8 potential outliers: 107, 106, 105, 104, 103, 102 and 2 more.")
+
+
+def test_description_of_a_whole_population(fixed):
+    description = narratives.describe(POPULATION, TRAITS[2])
+    assert description.startswith(f"The distribution of {TRAITS[2]} in {POPULATION} is ")
+    assert "The values range from 1 to 107, " in description
+    assert narratives.describe(POPULATION, TRAITS[3], "Male") is None
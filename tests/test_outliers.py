@@ -0,0 +1,88 @@
+import numpy as np
+from scipy import stats as scipy_stats
+
+from mosquitoteam import outliers
+from mosquitoteam.data import TRAITS
+
+
+def _pandas_flags(frame):
+    # IQR and MAD outliers of every trait, judged per population and gender with pandas
+    grouped = frame.groupby(["group", "gender"])[list(TRAITS)]
+    q1, median, q3 = (grouped.transform("quantile", q) for q in (0.25, 0.5, 0.75))
+    iqr = (frame[list(TRAITS)] < q1 - 1.5 * (q3 - q1)) | (frame[list(TRAITS)] > q3 + 1.5 * (q3 - q1))
+    deviation = (frame[list(TRAITS)] - median).abs()
+    mad = deviation.groupby([frame["group"], frame["gender"]]).transform("median")
+    return iqr, 0.6745 * deviation / mad > outliers.MAD_THRESHOLD
+
+
+def _grubbs(values):
+    # The repeated two-sided Grubbs test on one cell, one value per round
+    flagged = np.zeros(len(values), dtype=bool)
+    for _ in range(outliers.MAX_GRUBBS_ROUNDS):
+        active = ~np.isnan(values) & ~flagged
+        n = active.sum()
+        if n < 3:
+            break
+        kept = values[active]
+        score = np.where(active, np.abs(values - kept.mean()) / kept.std(ddof=1), -np.inf)
+        t = scipy_stats.t.isf(outliers.GRUBBS_ALPHA / (2 * n), n - 2)
+        if score.max() <= (n - 1) / np.sqrt(n) * np.sqrt(t ** 2 / (n - 2 + t ** 2)):
+            break
+        flagged[np.argmax(score)] = True
+    return flagged
+
+
+def _states(frame):
+    for state in (None, *sorted(frame["state"].unique())):
+        yield state, frame if state is None else frame[frame["state"] == state]
+
+
+def test_iqr_and_mad_match_pandas(frame):
+    for state, selected in _states(frame):
+        flags = outliers.outlier_flags(state)
+        for method, expected in zip(outliers.METHODS, _pandas_flags(selected)):
+            np.testing.assert_array_equal(flags[method][selected.index], expected.to_numpy(), err_msg=method)
+            # Rows of other mating states are never flagged
+            assert not flags[method][frame.index.difference(selected.index)].any()
+
+
+def test_grubbs_matches_a_plain_loop(frame):
+    for state, selected in _states(frame):
+        flags = outliers.outlier_flags(state)["Grubbs"]
+        for _, cell in selected.groupby(["group", "gender"]):
+            for column, trait in enumerate(TRAITS):
+                np.testing.assert_array_equal(flags[cell.index, column], _grubbs(cell[trait].to_numpy()),
+                                              err_msg=f"{trait} {state}")
+
+
+def test_outlier_table_lists_the_flags_of_the_state(frame):
+    state = sorted(frame["state"].unique())[0]
+    population = sorted(frame["group"].unique())[0]
+    table = outliers.outlier_table(TRAITS[2], population, state)
+    flags = outliers.outlier_flags(state)
+    expected = sum(flags[method][(frame["group"] == population).to_numpy(), 2].sum() for method in outliers.METHODS)
+    assert len(table) == expected
+
+
+def test_grubbs_takes_tied_values_in_row_order():
+    rng = np.random.default_rng(0)
+    values = rng.permutation(np.r_[rng.normal(size=2000).round(2), np.full(12, 50.0)])
+    _, _, grubbs = outliers.flag_outliers(np.zeros(len(values), dtype=np.intp), values, 1)
+    # The rounds run out before the twelve tied values do; the first rows go
+    np.testing.assert_array_equal(np.flatnonzero(grubbs), np.flatnonzero(values == 50)[:outliers.MAX_GRUBBS_ROUNDS])
+    np.testing.assert_array_equal(grubbs, _grubbs(values))
+
+
+def test_grubbs_flags_a_planted_outlier():
+    rng = np.random.default_rng(0)
+    values = np.r_[rng.normal(size=40), 12.0, rng.normal(size=40)]
+    cells = np.r_[np.zeros(41, dtype=np.intp), np.ones(40, dtype=np.intp)]
+    iqr, mad, grubbs = outliers.flag_outliers(cells, values, 2)
+    assert np.flatnonzero(grubbs).tolist() == [40]
+    assert iqr[40] and mad[40]
+
+
+def test_missing_values_are_never_flagged():
+    values = np.array([1.0, np.nan, 2.0, 3.0, 2.0, 100.0])
+    for mask in outliers.flag_outliers(np.zeros(6, dtype=np.intp), values, 1):
+        assert not mask[1]
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+from scipy import stats as scipy_stats
+
+from conftest import samples
+from mosquitoteam import resampling, stats
+from mosquitoteam.data import TRAITS
+
+RESAMPLES = 2000
+
+
+def _f_statistic(*groups, axis):
+    return scipy_stats.f_oneway(*groups, axis=axis).statistic
+
+
+def test_batch_sizes_cover_every_resample():
+    assert sum(resampling.batch_sizes(2500, 100)) == 2500
+    assert max(resampling.batch_sizes(2500, 100)) == resampling.BATCH_SIZE
+    # One (batch, rows) float64 array stays within BATCH_BYTES
+    assert max(resampling.batch_sizes(2500, 10 ** 5)) * 8 * 10 ** 5 <= resampling.BATCH_BYTES
+    assert max(resampling.batch_sizes(10, 10 ** 9)) == 1
+    with pytest.raises(ValueError):
+        resampling.batch_sizes(0, 10)
+
+
+def test_results_do_not_depend_on_the_workers():
+    one = resampling.permutation_anovas(resamples=1500, seed=3, workers=1)
+    two = resampling.permutation_anovas(resamples=1500, seed=3, workers=2)
+    np.testing.assert_array_equal(one["p-value"], two["p-value"])
+    one = resampling.bootstrap_differences(resamples=1500, seed=3, workers=1)
+    two = resampling.bootstrap_differences(resamples=1500, seed=3, workers=2)
+    np.testing.assert_array_equal(one[["lower", "upper"]], two[["lower", "upper"]])
+    one = resampling.group_permutation_anovas(resamples=1500, seed=3, workers=1)
+    two = resampling.group_permutation_anovas(resamples=1500, seed=3, workers=2)
+    np.testing.assert_array_equal(one["p-value"], two["p-value"])
+
+
+def test_permutation_p_values_are_in_range():
+    for test in (resampling.permutation_anovas, resampling.group_permutation_anovas):
+        p_values = test(resamples=RESAMPLES, workers=1)["p-value"]
+        assert ((p_values >= 1 / (RESAMPLES + 1)) & (p_values <= 1)).all()
+
+
+def test_permutation_anovas_match_scipy(frame):
+    result = resampling.permutation_anovas(resamples=RESAMPLES, workers=1).set_index(["population", "trait"])
+    np.testing.assert_allclose(result["F"], stats.gender_anovas()["F"], rtol=1e-9)
+    for population, cell in frame.groupby("group"):
+        for trait in TRAITS:
+            expected = scipy_stats.permutation_test(samples(cell, "gender", trait), _f_statistic,
+                                                    n_resamples=RESAMPLES, alternative="greater", vectorized=True,
+                                                    rng=0)
+            # Both are estimates from 2000 shuffles; they agree up to resampling noise
+            np.testing.assert_allclose(result.loc[(population, trait), "p-value"], expected.pvalue, atol=0.03)
+
+
+def test_bootstrap_brackets_the_mean_difference(frame):
+    result = resampling.bootstrap_differences(resamples=500, workers=1).set_index(["population", "trait"])
+    assert (result["lower"] <= result["meandiff"]).all() and (result["meandiff"] <= result["upper"]).all()
+    for population, cell in frame.groupby("group"):
+        first, second = (cell[cell["gender"] == gender] for gender in sorted(cell["gender"].unique()))
+        np.testing.assert_allclose(result.loc[population, "meandiff"].to_numpy(),
+                                   second[list(TRAITS)].mean().to_numpy() - first[list(TRAITS)].mean().to_numpy())
+
+
+def test_group_permutation_anovas_match_scipy(frame):
+    result = resampling.group_permutation_anovas(resamples=RESAMPLES, workers=1).set_index("trait")
+    for trait in TRAITS[:3]:
+        expected = scipy_stats.permutation_test(samples(frame, "group", trait), _f_statistic,
+                                                n_resamples=RESAMPLES, alternative="greater", vectorized=True, rng=0)
+        np.testing.assert_allclose(result.loc[trait, "F"], expected.statistic, rtol=1e-9)
+        np.testing.assert_allclose(result.loc[trait, "p-value"], expected.pvalue, atol=0.03)
+
+
+def test_group_bootstrap_brackets_the_mean_difference(frame):
+    result = resampling.group_bootstrap_differences(resamples=500, workers=1)
+    assert (result["lower"] <= result["meandiff"]).all() and (result["meandiff"] <= result["upper"]).all()
+    means = frame.groupby("group")[list(TRAITS)].mean()
+    for row in result.itertuples():
+        np.testing.assert_allclose(row.meandiff, means.loc[row.group2, row.trait] - means.loc[row.group1, row.trait])
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from scipy import stats as scipy_stats
+
+from conftest import samples
+from mosquitoteam import robust
+from mosquitoteam.data import TRAITS
+
+
+def test_welch_anovas_match_statsmodels(frame):
+    oneway = pytest.importorskip("statsmodels.stats.oneway")
+    result = robust.welch_anovas().set_index("trait")
+    for trait in TRAITS:
+        expected = oneway.anova_oneway(samples(frame, "group", trait), use_var="unequal")
+        np.testing.assert_allclose(result.loc[trait, "F"], expected.statistic, rtol=1e-9)
+        np.testing.assert_allclose(result.loc[trait, "df_within"], expected.df_denom, rtol=1e-9)
+        np.testing.assert_allclose(result.loc[trait, "p-value"], expected.pvalue, rtol=1e-9, atol=1e-300)
+
+
+def test_kruskal_wallis_matches_scipy(frame):
+    result = robust.kruskal_wallis().set_index("trait")
+    for trait in TRAITS:
+        expected = scipy_stats.kruskal(*samples(frame, "group", trait))
+        np.testing.assert_allclose(result.loc[trait, "H"], expected.statistic, rtol=1e-9)
+        np.testing.assert_allclose(result.loc[trait, "p-value"], expected.pvalue, rtol=1e-9, atol=1e-300)
+
+
+def test_games_howell_matches_its_definition(frame):
+    result = robust.games_howell().set_index(["trait", "group1", "group2"])
+    for trait in TRAITS:
+        groups = samples(frame, "group", trait)
+        names = sorted(frame["group"].unique())
+        for i in range(len(groups)):
+            for j in range(i + 1, len(groups)):
+                first, second = groups[i], groups[j]
+                v1, v2 = first.var(ddof=1) / len(first), second.var(ddof=1) / len(second)
+                df = (v1 + v2) ** 2 / (v1 ** 2 / (len(first) - 1) + v2 ** 2 / (len(second) - 1))
+                meandiff = second.mean() - first.mean()
+                q = abs(meandiff) / np.sqrt((v1 + v2) / 2)
+                margin = scipy_stats.studentized_range.ppf(0.95, len(groups), df) * np.sqrt((v1 + v2) / 2)
+                row = result.loc[(trait, names[i], names[j])]
+                np.testing.assert_allclose(row["meandiff"], meandiff, rtol=1e-9)
+                np.testing.assert_allclose(row["df"], df, rtol=1e-9)
+                np.testing.assert_allclose(row["p-adj"], scipy_stats.studentized_range.sf(q, len(groups), df),
+                                           rtol=1e-6, atol=1e-12)
+                # The bounds use the interpolated studentized range quantile
+                np.testing.assert_allclose(row["upper"] - row["meandiff"], margin, rtol=1e-3)
+
+
+def test_studentized_range_quantile_interpolation():
+    df = np.array([12.0, 30.0, 75.0, 160.0, 500.0, 1000.0, 2500.0])
+    expected = scipy_stats.studentized_range.ppf(0.95, 3, df)
+    np.testing.assert_allclose(robust.studentized_range_quantile(0.95, 3, df), expected, rtol=1e-3)
+
+
+@pytest.mark.parametrize("k", [3, 10])
+def test_studentized_range_quantile_error_bound(k):
+    # The bounds documented beside the Games-Howell table
+    df = np.geomspace(2, 1e4, 8)
+    expected = scipy_stats.studentized_range.ppf(0.95, k, df)
+    np.testing.assert_allclose(robust.studentized_range_quantile(0.95, k, df), expected, rtol=1e-2)
+    df = df[df >= 10]
+    expected = scipy_stats.studentized_range.ppf(0.95, k, df)
+    np.testing.assert_allclose(robust.studentized_range_quantile(0.95, k, df), expected, rtol=3e-4)
@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats as scipy_stats
+
+from conftest import samples
+from mosquitoteam import data, stats
+from mosquitoteam.data import STATE_COLUMN, TRAITS
+from mosquitoteam.figures import build_figure
+
+
+def test_gender_anovas_match_scipy(frame):
+    anovas = stats.gender_anovas().set_index(["population", "trait"])
+    for population, cell in frame.groupby("group"):
+        for trait in TRAITS:
+            expected = scipy_stats.f_oneway(*samples(cell, "gender", trait))
+            result = anovas.loc[(population, trait)]
+            np.testing.assert_allclose(result["F"], expected.statistic, rtol=1e-9)
+            np.testing.assert_allclose(result["p-value"], expected.pvalue, rtol=1e-9, atol=1e-300)
+
+
+def test_gender_anovas_of_one_state_match_scipy(frame):
+    state = sorted(frame["state"].unique())[0]
+    anovas = stats.gender_anovas(state).set_index(["population", "trait"])
+    for population, cell in frame[frame["state"] == state].groupby("group"):
+        for trait in TRAITS:
+            expected = scipy_stats.f_oneway(*samples(cell, "gender", trait))
+            np.testing.assert_allclose(anovas.loc[(population, trait), "F"], expected.statistic, rtol=1e-9)
+
+
+@pytest.mark.parametrize("trait", TRAITS)
+def test_group_anova_matches_scipy(frame, trait):
+    result = stats.one_way_anova(stats.population_moments(trait))
+    expected = scipy_stats.f_oneway(*samples(frame, "group", trait))
+    np.testing.assert_allclose(result["F"], expected.statistic, rtol=1e-9)
+    np.testing.assert_allclose(result["p-value"], expected.pvalue, rtol=1e-9, atol=1e-300)
+
+
+@pytest.mark.parametrize("trait", TRAITS)
+def test_tukey_hsd_matches_statsmodels(frame, trait):
+    multicomp = pytest.importorskip("statsmodels.stats.multicomp")
+    present = frame[frame[trait].notna()]
+    expected = multicomp.pairwise_tukeyhsd(present[trait], present["group"]).summary()
+    expected = pd.DataFrame(expected.data[1:], columns=expected.data[0])
+    result = stats.tukey_hsd(stats.population_moments(trait)).round(4)
+    assert list(result["group1"]) == list(expected["group1"])
+    assert list(result["group2"]) == list(expected["group2"])
+    for column in ("meandiff", "p-adj", "lower", "upper"):
+        np.testing.assert_allclose(result[column], expected[column].astype("float64"), atol=1.5e-4)
+    assert list(result["reject"]) == list(expected["reject"])
+
+
+def test_bin_counts_match_numpy():
+    values = np.random.default_rng(0).normal(size=500).round(1)
+    for bins, (edges, counts) in stats.bin_counts(values).items():
+        expected_counts, expected_edges = np.histogram(values, bins=bins)
+        np.testing.assert_array_equal(counts, expected_counts)
+        np.testing.assert_allclose(edges, expected_edges)
+
+
+def test_trait_histograms_count_every_measured_value(frame):
+    for (population, gender), cell in frame.groupby(["group", "gender"]):
+        for trait in TRAITS:
+            for bins, (edges, counts) in stats.trait_histograms(trait, population, gender).items():
+                assert counts.sum() == cell[trait].notna().sum()
+                np.testing.assert_array_equal(counts, np.histogram(cell[trait].dropna(), bins=bins)[0])
+
+
+def _plotly_box(values):
+    # plotly.js box calc with quartilemethod "linear", ported line by line
+    values = np.sort(values[~np.isnan(values)])
+    n = len(values)
+
+    def interp(p):
+        position = p * n - 0.5
+        if position < 0:
+            return values[0]
+        if position > n - 1:
+            return values[-1]
+        fraction = position % 1
+        return fraction * values[int(np.ceil(position))] + (1 - fraction) * values[int(np.floor(position))]
+
+    q1, median, q3 = interp(0.25), interp(0.5), interp(0.75)
+    lower = min(q1, values[min(np.searchsorted(values, 2.5 * q1 - 1.5 * q3, "left"), n - 1)])
+    upper = max(q3, values[max(np.searchsorted(values, 2.5 * q3 - 1.5 * q1, "right") - 1, 0)])
+    return q1, median, q3, lower, upper
+
+
+def test_box_stats_match_plotly(frame):
+    rng = np.random.default_rng(0)
+    synthetic = pd.DataFrame({"group": rng.choice(["a", "b", "c"], 300), "value": rng.integers(0, 8, 300) ** 2.0})
+    for data, by, traits in ((frame, "gender", TRAITS), (synthetic, "group", ["value"])):
+        for trait in traits:
+            summary, outliers = stats.box_stats(data, by, trait)
+            for group, cell in data.groupby(by):
+                expected = _plotly_box(cell[trait].to_numpy())
+                np.testing.assert_allclose(summary.loc[group].to_numpy(dtype="float64"), expected, rtol=1e-12)
+                outside = (cell[trait] < expected[3]) | (cell[trait] > expected[4])
+                np.testing.assert_array_equal(outliers[cell.index], outside)
+
+
+def test_point_sample_caps_every_group():
+    groups = pd.Series(np.repeat(["large", "small", "exact"], [500, 7, 50]))
+    mask = stats.point_sample(groups, 50)
+    counts = mask.groupby(groups).sum()
+    assert counts.to_dict() == {"exact": 50, "large": 50, "small": 7}
+    # The same seed draws the same points
+    pd.testing.assert_series_equal(mask, stats.point_sample(groups, 50))
+
+
+def test_summaries_match_describe(frame):
+    for state in (None, *sorted(frame["state"].unique())):
+        selected = frame if state is None else frame[frame["state"] == state]
+        summaries = stats.summaries(state).sort_index()
+        cells = [*selected.groupby(["group", "gender"]),
+                 *(((population, stats.ALL_GENDERS), cell) for population, cell in selected.groupby("group"))]
+        for (population, gender), cell in cells:
+            expected = cell[list(TRAITS)].describe().T[stats.DESCRIBE_STATS]
+            result = summaries.loc[(population, gender)].loc[list(TRAITS)]
+            # Weights are stored as float32, which pandas also aggregates in
+            np.testing.assert_allclose(result.to_numpy(dtype="float64"), expected.to_numpy(), rtol=1e-6)
+
+
+def test_trait_summary_of_an_empty_cell(frame):
+    empty = pd.Series(dtype="float64").describe()
+    result = stats.trait_summary(TRAITS[0], "no such population")
+    assert result["count"] == 0 and result.drop("count").isna().all()
+    assert list(result.index) == list(empty.index) == stats.DESCRIBE_STATS
+
+
+def test_population_without_individuals_in_a_state(data_copy):
+    # One population observed in a single mating state, viewed in another
+    name = data.populations()[0]
+    frame = data.load_population(name)
+    kept, dropped = frame[STATE_COLUMN].dropna().unique()[:2]
+    frame[frame[STATE_COLUMN] == kept].to_csv(data.population_path(name), index=False)
+    assert not len(data.select_groups(["gender"], name, state=dropped))
+
+    summary, outliers = stats.box_stats(data.select_groups(["gender", TRAITS[0]], name, state=dropped),
+                                        "gender", TRAITS[0])
+    assert summary.empty and list(summary.columns) == stats.BOX_STATS and not len(outliers)
+    assert not build_figure("gender_box", name, TRAITS[0], state=dropped).figure.data
+    for gender in frame[name].dropna().unique():
+        assert stats.trait_summary(TRAITS[0], name, gender, dropped)["count"] == 0